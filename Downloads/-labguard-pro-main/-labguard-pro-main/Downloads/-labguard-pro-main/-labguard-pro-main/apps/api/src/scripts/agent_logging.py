@@ -0,0 +1,118 @@
+"""
+LabGuard Pro Agent Logging
+Queue-backed structured JSON logging with per-request trace IDs and
+sampled debug output for the Biomni agent
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Optional
+
+request_id_var: contextvars.ContextVar = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the active request id and sample DEBUG chatter"""
+
+    def __init__(self, debug_sample_rate: float = 1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records untouched so message formatting happens on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, 'request_id', None)
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: Optional[str] = None, debug_sample_rate: Optional[float] = None,
+                      json_output: Optional[bool] = None, stream=None) -> None:
+    """Route all agent logging through a background queue listener"""
+    global _listener
+
+    level = (level or os.getenv('BIOMNI_LOG_LEVEL', 'INFO')).upper()
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.getenv('BIOMNI_DEBUG_SAMPLE_RATE', '1.0'))
+    if json_output is None:
+        json_output = os.getenv('BIOMNI_LOG_FORMAT', 'json') == 'json'
+
+    if _listener is not None:
+        _listener.stop()
+
+    target = logging.StreamHandler(stream or sys.stderr)
+    target.setFormatter(JSONFormatter() if json_output else logging.Formatter(
+        '%(levelname)s:%(name)s:%(request_id)s:%(message)s'
+    ))
+
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestContextFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    # With sampling switched off, keep DEBUG disabled so debug calls short-circuit
+    root.setLevel(logging.INFO if level == 'DEBUG' and debug_sample_rate <= 0 else level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, target, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+class RequestScope:
+    """Bind a request id to the current context for the duration of a block"""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self._token = None
+
+    def __enter__(self) -> 'RequestScope':
+        self._token = request_id_var.set(self.request_id)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        request_id_var.reset(self._token)
@@ -11,17 +11,57 @@ import sys
 import os
 import requests
 import time
+import uuid
+import threading
+import contextvars
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 import base64
 import cv2
 import numpy as np
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 import logging
 from PIL import Image
 import io
+from urllib.parse import quote
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from agent_logging import RequestScope, configure_logging
+from compliance_rules import DEFAULT_RULES, CompiledRules, ComplianceState, Rule, load_rules
+from cost_catalog import CostCatalog, PriceScenario
+from image_input import ImageSource, decode_image
+from load_replay import TrafficRecorder
+from pcr_thermo import PCRConditionGrid, extract_primers, search_conditions
+from risk_simulation import DEFAULT_RISKS, Risk, SimulationConfig, simulate
+from timeline_scheduler import DEFAULT_TASKS, ProjectSchedule, Task
+from tool_pool import PoolConfig, ToolProcessPool
+from tool_profiler import ToolProfiler
+from tool_router import ToolRouter
+from vision_analysis import count_cells, image_quality_metrics
+from westgard_qc import WestgardMonitor, persistent_monitor
+
+# Tools that receive the decoded image payload as parameters["image"]
+IMAGE_TOOLS = {'visual_analyzer', 'microscopy_interpreter'}
+
+# CPU-bound tools dispatched to the tool process pool when one is configured
+POOL_TOOLS = IMAGE_TOOLS
+
+# Tools that accept parameters["time_budget"] and trade accuracy for speed, and
+# stop work at parameters["deadline"] once the caller has given up on them
+APPROXIMATE_TOOLS = {'risk_assessor'}
+
+# Single-core risk simulation throughput (sample x risk per second) and accuracy floor
+RISK_SAMPLES_PER_SECOND = 5_000_000
+MIN_RISK_SAMPLES = 10_000
+
+# Result statuses for tools cut off by a query deadline
+PENDING = "PENDING"
+TIMED_OUT = "TIMED_OUT"
+
+# Compliance states built during the current request, shared by the compliance tools
+compliance_states_var: contextvars.ContextVar = contextvars.ContextVar('compliance_states', default=None)
+
+# Logging is routed through a background queue by configure_logging(), called from
+# main() or, for library use without any logging setup, from BiomniAgent()
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -30,6 +70,12 @@ class BiomniQuery:
     tools: List[str]
     databases: List[str]
     category: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    request_id: Optional[str] = None
+    image: Optional[ImageSource] = None
+    deadline: Optional[float] = None  # time.time() by which a (partial) answer is due
+    routing: str = 'explicit'  # 'auto' prunes tools the query text does not call for
+    max_tools: Optional[int] = None
 
 @dataclass
 class BiomniResult:
@@ -40,8 +86,32 @@ class BiomniResult:
     confidence: Optional[float] = None
     cost: Optional[float] = None
 
+def run_in_daemon_thread(fn, *args) -> Future:
+    """Run fn on a daemon thread so an abandoned tool never delays process exit"""
+    future: Future = Future()
+    context = contextvars.copy_context()
+    
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(fn, *args))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
 class BiomniAgent:
-    def __init__(self):
+    def __init__(self, tool_pool: Optional[ToolProcessPool] = None,
+                 traffic_recorder: Optional[TrafficRecorder] = None,
+                 profiler: Optional[ToolProfiler] = None):
+        # Embedding applications that configured logging themselves keep their handlers
+        if not logging.getLogger().handlers:
+            configure_logging()
+        self.tool_pool = tool_pool
+        self.traffic_recorder = traffic_recorder
+        self.profiler = profiler
         self.api_key = os.getenv('BIOMNI_API_KEY', 'demo-key')
         self.base_url = os.getenv('BIOMNI_BASE_URL', 'https://api.biomni.stanford.edu')
         self.available_tools = {
@@ -83,20 +153,118 @@ class BiomniAgent:
             'troubleshooting_database': 'Troubleshooting guides',
             'best_practices_database': 'Laboratory best practices'
         }
+        self.routing_examples_path = os.getenv('BIOMNI_ROUTING_EXAMPLES')
+        self._tool_router: Optional[ToolRouter] = None
+        self.cost_catalog_path = os.getenv('BIOMNI_COST_CATALOG')
+        self._cost_catalog: Optional[CostCatalog] = None
+        # Westgard state per lab/instrument; kept in memory unless a state directory is set
+        self.qc_state_dir = os.getenv('BIOMNI_QC_STATE_DIR')
+        self.qc_monitors: Dict[str, WestgardMonitor] = {}
+        self._qc_lock = threading.Lock()
+        rules_path = os.getenv('BIOMNI_COMPLIANCE_RULES')
+        self.compliance_rules = CompiledRules.from_dicts(
+            load_rules(rules_path) if rules_path else DEFAULT_RULES
+        )
+        self._compliance_lock = threading.RLock()
+
+    def get_cost_catalog(self) -> Optional[CostCatalog]:
+        """Lazily memory-map the equipment and reagent cost catalog"""
+        if self._cost_catalog is None and self.cost_catalog_path:
+            self._cost_catalog = CostCatalog.load(self.cost_catalog_path)
+        return self._cost_catalog
+
+    def get_tool_router(self) -> ToolRouter:
+        """Build the routing index once, seeded with past queries when configured"""
+        if self._tool_router is None:
+            if self.routing_examples_path:
+                self._tool_router = ToolRouter.from_examples_file(self.routing_examples_path)
+            else:
+                self._tool_router = ToolRouter()
+        return self._tool_router
+
+    def build_compliance_state(self, parameters: Dict[str, Any]) -> ComplianceState:
+        """Evaluate equipment, calibration and training records against the rule set"""
+        extra_rules = parameters.get("rules", [])
+        records = [
+            {**record, "id": str(record.get("id", index))}
+            for index, record in enumerate(parameters.get("records", []))
+        ]
+        states = compliance_states_var.get()
+        key = (json.dumps(extra_rules, sort_keys=True, default=str),
+               tuple(sorted(record["id"] for record in records)))
+        
+        # Within a request each (rules, record ids) state is built once; later calls
+        # only re-evaluate the fields that changed
+        state = states.get(key) if states is not None else None
+        if state is None:
+            rules = self.compliance_rules
+            if extra_rules:
+                rules = CompiledRules(rules.rules + [Rule.from_dict(rule) for rule in extra_rules])
+            state = ComplianceState(rules)
+            for record in records:
+                state.add_record(record)
+            if states is not None:
+                states[key] = state
+            return state
+        
+        for record in records:
+            current = state.records[record["id"]]
+            changes = {name: value for name, value in record.items() if current.get(name) != value}
+            if changes:
+                state.update_record(record["id"], changes)
+        return state
+
+    def compliance_report(self, parameters: Dict[str, Any], domain: str) -> Dict[str, Any]:
+        """Report one rule domain; serialised so concurrent tools can share a state"""
+        with self._compliance_lock:
+            return self.build_compliance_state(parameters).report(domain)
 
     def execute_query(self, query: BiomniQuery) -> BiomniResult:
         """Execute a Biomni query using specified tools and databases"""
+        states_token = compliance_states_var.set({})
+        try:
+            with RequestScope(query.request_id or uuid.uuid4().hex[:16]):
+                return self._execute_query(query)
+        finally:
+            compliance_states_var.reset(states_token)
+
+    def _execute_query(self, query: BiomniQuery) -> BiomniResult:
         start_time = time.time()
         
         try:
-            logger.info(f"Executing Biomni query: {query.query}")
-            logger.info(f"Tools: {query.tools}")
-            logger.info(f"Databases: {query.databases}")
+            logger.info("Executing Biomni query", extra={
+                "category": query.category,
+                "tools": query.tools,
+                "databases": query.databases
+            })
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Query text: %s", query.query)
             
             # Validate tools and databases
             valid_tools = [tool for tool in query.tools if tool in self.available_tools]
             valid_databases = [db for db in query.databases if db in self.available_databases]
             
+            routing = None
+            if query.routing == 'auto':
+                # "auto" (or no tools at all) lets the router choose from every tool
+                candidates = valid_tools
+                if not query.tools or 'auto' in query.tools:
+                    candidates = list(self.available_tools)
+                # Tools the caller configured or that need the attached image always run
+                pinned = [tool for tool in candidates if tool in query.parameters
+                          or (query.image is not None and tool in IMAGE_TOOLS)]
+                routing = self.get_tool_router().route(query.query, candidates, pinned, query.max_tools)
+                valid_tools = routing.selected
+                logger.info("Routed query", extra={
+                    "selected": routing.selected,
+                    "pruned": len(routing.pruned),
+                    "duration_ms": routing.duration_ms
+                })
+            
+            if self.traffic_recorder is not None:
+                # Record the tools that actually run so replay reproduces this workload
+                self.traffic_recorder.record(query, start_time, valid_tools)
+            
             if not valid_tools:
                 return BiomniResult(
                     success=False,
@@ -104,20 +272,92 @@ class BiomniAgent:
                     error="No valid tools specified"
                 )
             
-            # Execute tools in sequence
+            pooled_tools = []
+            if self.tool_pool is not None:
+                pooled_tools = [tool for tool in valid_tools if tool in POOL_TOOLS]
+            
+            # Decode a handed-over image once, straight from the shared buffer.
+            # Pool workers map shm/path sources themselves instead of receiving a pickled copy.
+            image = None
+            shareable_image = query.image is not None and query.image.kind in ('shm', 'path')
+            if query.image is not None and any(
+                tool in IMAGE_TOOLS and (tool not in pooled_tools or not shareable_image)
+                for tool in valid_tools
+            ):
+                image = decode_image(query.image)
+            
+            def tool_parameters(tool: str) -> Optional[Dict[str, Any]]:
+                tool_params = query.parameters.get(tool)
+                if query.deadline is not None and tool in APPROXIMATE_TOOLS:
+                    tool_params = {**(tool_params or {}), "time_budget": max(query.deadline - time.time(), 0.0),
+                                   "deadline": query.deadline}
+                if query.image is not None and tool in IMAGE_TOOLS:
+                    if tool in pooled_tools and shareable_image:
+                        return {**(tool_params or {}), "image_source": query.image}
+                    return {**(tool_params or {}), "image": image}
+                return tool_params
+            
+            def deadline_passed() -> bool:
+                return query.deadline is not None and time.time() >= query.deadline
+            
+            # Start CPU-bound tools in worker processes. With a deadline the remaining
+            # tools run concurrently on daemon threads so stragglers can be abandoned;
+            # otherwise they run in sequence.
             results = {}
+            tool_durations = {}
+            futures = {}
+            for tool in pooled_tools:
+                futures[tool] = (time.perf_counter(), self.tool_pool.submit(
+                    tool, query.query, valid_databases, tool_parameters(tool)
+                ))
+            
             for tool in valid_tools:
+                if tool in futures:
+                    continue
+                if deadline_passed():
+                    results[tool] = {"status": PENDING}
+                    continue
+                if query.deadline is not None:
+                    futures[tool] = (time.perf_counter(), run_in_daemon_thread(
+                        self.call_tool, tool, query.query, valid_databases, tool_parameters(tool)
+                    ))
+                    continue
+                tool_start = time.perf_counter()
+                try:
+                    results[tool] = self.call_tool(tool, query.query, valid_databases, tool_parameters(tool))
+                except Exception as e:
+                    logger.error("Tool %s failed: %s", tool, e, extra={"tool": tool})
+                    results[tool] = {"error": str(e)}
+                tool_durations[tool] = round((time.perf_counter() - tool_start) * 1000, 3)
+                logger.debug("Tool finished", extra={"tool": tool, "duration_ms": tool_durations[tool]})
+            
+            for tool, (tool_start, future) in futures.items():
+                remaining = None if query.deadline is None else max(query.deadline - time.time(), 0.0)
                 try:
-                    tool_result = self.available_tools[tool](query.query, valid_databases)
-                    results[tool] = tool_result
+                    results[tool] = future.result(timeout=remaining)
+                except FutureTimeoutError:
+                    # Calls that never started are cancelled; running ones (in a thread or a pool
+                    # worker) cannot be, so they are abandoned. Tools that honour
+                    # parameters["deadline"] stop themselves.
+                    results[tool] = {"status": PENDING if future.cancel() else TIMED_OUT}
+                    logger.warning("Tool %s missed the deadline", tool, extra={"tool": tool})
                 except Exception as e:
-                    logger.error(f"Tool {tool} failed: {str(e)}")
+                    logger.error("Tool %s failed: %s", tool, e, extra={"tool": tool})
                     results[tool] = {"error": str(e)}
+                tool_durations[tool] = round((time.perf_counter() - tool_start) * 1000, 3)
+                logger.debug("Tool finished", extra={"tool": tool, "duration_ms": tool_durations[tool]})
+            results = {tool: results[tool] for tool in valid_tools}
             
             # Combine results
             combined_result = self.combine_results(results, query.category)
+            if routing is not None:
+                combined_result["routing"] = routing.to_dict()
             
             processing_time = time.time() - start_time
+            logger.info("Biomni query completed", extra={
+                "duration_ms": round(processing_time * 1000, 3),
+                "tool_durations_ms": tool_durations
+            })
             
             return BiomniResult(
                 success=True,
@@ -128,16 +368,38 @@ class BiomniAgent:
             )
             
         except Exception as e:
-            logger.error(f"Query execution failed: {str(e)}")
+            logger.error("Query execution failed: %s", e)
             return BiomniResult(
                 success=False,
                 data={},
                 error=str(e)
             )
 
-    def analyze_visual(self, query: str, databases: List[str]) -> Dict[str, Any]:
+    def call_tool(self, tool: str, query: str, databases: List[str],
+                  parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Invoke one tool in-process, under the profiler when one is attached"""
+        args = (query, databases) if parameters is None else (query, databases, parameters)
+        if self.profiler is not None:
+            return self.profiler.call(tool, self.available_tools[tool], *args)
+        return self.available_tools[tool](*args)
+
+    def analyze_visual(self, query: str, databases: List[str],
+                       parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Analyze visual data (images) using computer vision"""
-        logger.info("Analyzing visual data")
+        logger.debug("Analyzing visual data")
+        parameters = parameters or {}
+        
+        if parameters.get("image") is not None:
+            analysis = image_quality_metrics(parameters["image"])
+            recommendations = []
+            if analysis["color_analysis"]["contrast"] < 0.3:
+                recommendations.append("Consider adjusting lighting for better contrast")
+            if analysis["sharpness"] < 0.001:
+                recommendations.append("Image appears blurred; check focus")
+            if analysis["image_quality"] >= 80:
+                recommendations.append("Image quality is acceptable for analysis")
+            analysis["recommendations"] = recommendations
+            return analysis
         
         # Extract image URL from query
         image_url = self.extract_image_url(query)
@@ -169,7 +431,7 @@ class BiomniAgent:
 
     def assess_sample_quality(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Assess sample quality from visual data"""
-        logger.info("Assessing sample quality")
+        logger.debug("Assessing sample quality")
         
         assessment = {
             "quality_score": 78,
@@ -193,7 +455,7 @@ class BiomniAgent:
 
     def analyze_culture_growth(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Analyze culture growth patterns"""
-        logger.info("Analyzing culture growth patterns")
+        logger.debug("Analyzing culture growth patterns")
         
         analysis = {
             "growth_rate": 0.85,
@@ -212,7 +474,7 @@ class BiomniAgent:
 
     def detect_contamination(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Detect contamination in samples"""
-        logger.info("Detecting contamination")
+        logger.debug("Detecting contamination")
         
         detection = {
             "contamination_detected": False,
@@ -230,7 +492,7 @@ class BiomniAgent:
 
     def monitor_equipment_condition(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Monitor equipment condition from visual data"""
-        logger.info("Monitoring equipment condition")
+        logger.debug("Monitoring equipment condition")
         
         condition = {
             "equipment_status": "Good",
@@ -246,9 +508,27 @@ class BiomniAgent:
         
         return condition
 
-    def interpret_microscopy(self, query: str, databases: List[str]) -> Dict[str, Any]:
+    def interpret_microscopy(self, query: str, databases: List[str],
+                             parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Interpret microscopy images"""
-        logger.info("Interpreting microscopy image")
+        logger.debug("Interpreting microscopy image")
+        parameters = parameters or {}
+        
+        if parameters.get("image") is not None:
+            cells = count_cells(parameters["image"], int(parameters.get("min_cell_area", 20)))
+            irregular = cells["area_cv"] > 1.0
+            return {
+                **cells,
+                "cell_morphology": "Irregular" if irregular else "Normal",
+                "findings": [
+                    f"{cells['cell_count']} cells segmented covering {cells['coverage']:.1%} of the field",
+                    "High variation in cell size" if irregular else "Cell sizes are consistent"
+                ],
+                "recommendations": [
+                    "Review segmentation for clumped cells" if irregular else "Results are suitable for analysis",
+                    "Document findings for future reference"
+                ]
+            }
         
         interpretation = {
             "cell_count": 1500,
@@ -269,22 +549,90 @@ class BiomniAgent:
         
         return interpretation
 
-    def optimize_pcr(self, query: str, databases: List[str]) -> Dict[str, Any]:
+    def optimize_pcr(self, query: str, databases: List[str],
+                     parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Optimize PCR protocols"""
-        logger.info("Optimizing PCR protocol")
+        logger.debug("Optimizing PCR protocol")
+        parameters = parameters or {}
+        
+        pairs = parameters.get("primer_pairs")
+        if pairs is None:
+            # Fall back to consecutive forward/reverse sequences in the query text
+            sequences = extract_primers(query)
+            pairs = [
+                {"forward": sequences[i], "reverse": sequences[i + 1]}
+                for i in range(0, len(sequences) - 1, 2)
+            ]
+        
+        cycle_count = int(parameters.get("cycle_count", 35))
+        
+        if not pairs:
+            return {
+                "optimal_conditions": {
+                    "annealing_temperature": 58,
+                    "extension_time": 30,
+                    "cycle_count": cycle_count,
+                    "primer_concentration": 0.5
+                },
+                "primer_pairs": [],
+                "efficiency_improvements": [
+                    "Provide primer sequences to compute nearest-neighbour melting temperatures"
+                ],
+                "expected_results": "Default conditions returned; no primers supplied"
+            }
+        
+        grid_overrides = {
+            key: parameters[key]
+            for key in PCRConditionGrid.__dataclass_fields__
+            if key in parameters
+        }
+        grid = PCRConditionGrid(**grid_overrides)
+        default_amplicon = float(parameters.get("amplicon_length", 500))
+        
+        search = search_conditions(
+            [pair["forward"] for pair in pairs],
+            [pair["reverse"] for pair in pairs],
+            [float(pair.get("amplicon_length", default_amplicon)) for pair in pairs],
+            grid
+        )
+        
+        primer_pairs = []
+        for i, pair in enumerate(pairs):
+            primer_pairs.append({
+                "name": pair.get("name", f"pair_{i + 1}"),
+                "tm_forward": round(float(search["tm_forward"][i]), 1),
+                "tm_reverse": round(float(search["tm_reverse"][i]), 1),
+                "gc_forward": round(float(search["gc_forward"][i]), 3),
+                "gc_reverse": round(float(search["gc_reverse"][i]), 3),
+                "annealing_temperature": float(search["annealing_temperature"][i]),
+                "extension_time": float(search["extension_time"][i]),
+                "primer_concentration": float(search["primer_concentration"][i]),
+                "penalty": round(float(search["penalty"][i]), 3)
+            })
+        
+        efficiency_improvements = []
+        mismatched = [p["name"] for p in primer_pairs if abs(p["tm_forward"] - p["tm_reverse"]) > 5]
+        if mismatched:
+            efficiency_improvements.append(
+                f"Redesign primers with Tm mismatch above 5 °C: {', '.join(mismatched[:10])}"
+            )
+        extreme_gc = [
+            p["name"] for p in primer_pairs
+            if not (0.4 <= p["gc_forward"] <= 0.6 and 0.4 <= p["gc_reverse"] <= 0.6)
+        ]
+        if extreme_gc:
+            efficiency_improvements.append(
+                f"GC content outside 40-60% for: {', '.join(extreme_gc[:10])}"
+            )
+        efficiency_improvements.append("Annealing temperature set just below the lower primer Tm")
         
         optimization = {
             "optimal_conditions": {
-                "annealing_temperature": 58,
-                "extension_time": 30,
-                "cycle_count": 35,
-                "primer_concentration": 0.5
+                **search["plate"],
+                "cycle_count": cycle_count
             },
-            "efficiency_improvements": [
-                "Increased annealing temperature for better specificity",
-                "Optimized primer concentration",
-                "Adjusted cycle parameters"
-            ],
+            "primer_pairs": primer_pairs,
+            "efficiency_improvements": efficiency_improvements,
             "expected_results": "Improved amplification efficiency and specificity"
         }
         
@@ -292,7 +640,7 @@ class BiomniAgent:
 
     def analyze_sequencing(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Analyze sequencing data"""
-        logger.info("Analyzing sequencing data")
+        logger.debug("Analyzing sequencing data")
         
         analysis = {
             "sequence_quality": "High",
@@ -314,7 +662,7 @@ class BiomniAgent:
 
     def process_flow_cytometry(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Process flow cytometry data"""
-        logger.info("Processing flow cytometry data")
+        logger.debug("Processing flow cytometry data")
         
         processing = {
             "cell_populations": {
@@ -338,7 +686,7 @@ class BiomniAgent:
 
     def monitor_cell_culture(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Monitor cell culture conditions"""
-        logger.info("Monitoring cell culture conditions")
+        logger.debug("Monitoring cell culture conditions")
         
         monitoring = {
             "culture_status": "Healthy",
@@ -367,7 +715,7 @@ class BiomniAgent:
 
     def generate_protocol(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Generate experimental protocol using AI"""
-        logger.info("Generating experimental protocol")
+        logger.debug("Generating experimental protocol")
         
         # Simulate protocol generation
         protocol = {
@@ -406,7 +754,7 @@ class BiomniAgent:
 
     def assist_research(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Provide research assistance using AI"""
-        logger.info("Providing research assistance")
+        logger.debug("Providing research assistance")
         
         # Simulate research assistance
         assistance = {
@@ -429,7 +777,7 @@ class BiomniAgent:
 
     def analyze_data(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Analyze research data using AI"""
-        logger.info("Analyzing research data")
+        logger.debug("Analyzing research data")
         
         # Simulate data analysis
         analysis = {
@@ -451,7 +799,7 @@ class BiomniAgent:
 
     def optimize_equipment(self, query: str, databases: List[str]) -> Dict[str, Any]:
         """Optimize equipment usage and calibration"""
-        logger.info("Optimizing equipment usage")
+        logger.debug("Optimizing equipment usage")
         
         # Simulate equipment optimization
         optimization = {
@@ -475,31 +823,36 @@ class BiomniAgent:
         
         return optimization
 
-    def check_safety(self, query: str, databases: List[str]) -> Dict[str, Any]:
+    def check_safety(self, query: str, databases: List[str],
+                     parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Check safety compliance"""
-        logger.info("Checking safety compliance")
+        logger.debug("Checking safety compliance")
+        
+        report = self.compliance_report(parameters or {}, "safety")
         
-        # Simulate safety check
         safety_check = {
-            "compliance_status": "COMPLIANT",
-            "safety_issues": [],
+            "compliance_status": "COMPLIANT" if not report["findings"] else "NON_COMPLIANT",
+            "safety_issues": report["findings"],
             "recommendations": [
                 "Maintain safety documentation",
                 "Conduct regular safety training",
                 "Update safety protocols as needed"
             ],
-            "required_actions": []
+            "required_actions": sorted({f["action"] for f in report["findings"] if f["action"]}),
+            "safety_score": report["score"]
         }
         
         return safety_check
 
-    def validate_compliance(self, query: str, databases: List[str]) -> Dict[str, Any]:
+    def validate_compliance(self, query: str, databases: List[str],
+                            parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Validate regulatory compliance"""
-        logger.info("Validating regulatory compliance")
+        logger.debug("Validating regulatory compliance")
+        
+        report = self.compliance_report(parameters or {}, "compliance")
         
-        # Simulate compliance validation
         compliance = {
-            "regulatory_status": "COMPLIANT",
+            "regulatory_status": "COMPLIANT" if not report["findings"] else "NON_COMPLIANT",
             "required_documentation": [
                 "Standard Operating Procedures",
                 "Quality Control Records",
@@ -510,102 +863,223 @@ class BiomniAgent:
                 "External certification",
                 "Documentation review"
             ],
-            "compliance_score": 95
+            "violations": report["findings"],
+            "compliance_score": report["score"]
         }
         
         return compliance
 
-    def calculate_costs(self, query: str, databases: List[str]) -> Dict[str, Any]:
+    def calculate_costs(self, query: str, databases: List[str],
+                        parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Calculate project costs"""
-        logger.info("Calculating project costs")
+        logger.debug("Calculating project costs")
+        parameters = parameters or {}
+        
+        if "catalog" in parameters:
+            catalog = CostCatalog.from_records(parameters["catalog"])
+        else:
+            catalog = self.get_cost_catalog()
+        line_items = parameters.get("line_items", [])
+        scenario = None
+        if "scenario" in parameters:
+            scenario = PriceScenario.from_dict(parameters["scenario"])
+        
+        if catalog is None or not line_items:
+            # No catalog or protocol line items: fall back to the baseline estimate
+            equipment_costs = float(parameters.get("equipment_costs", 5000))
+            reagent_costs = float(parameters.get("reagent_costs", 2000))
+            by_category = {}
+            missing_skus = []
+        else:
+            roll_up = catalog.roll_up(
+                [str(item["sku"]) for item in line_items],
+                [item.get("quantity", 1) for item in line_items],
+                scenario
+            )
+            equipment_costs = roll_up["by_kind"]["equipment"]
+            reagent_costs = roll_up["by_kind"]["reagent"]
+            by_category = roll_up["by_category"]
+            missing_skus = roll_up["missing_skus"]
+        
+        personnel_costs = float(parameters.get("personnel_costs", 10000))
+        overhead_rate = float(parameters.get("overhead_rate", 0.15))
+        if not 0 <= overhead_rate < 1:
+            raise ValueError(f"overhead_rate must be in [0, 1), got {overhead_rate}")
+        direct_costs = equipment_costs + reagent_costs + personnel_costs
+        overhead_costs = direct_costs * overhead_rate / (1 - overhead_rate)
+        total_cost = direct_costs + overhead_costs
+        
+        def share(amount: float) -> str:
+            return f"{round(100 * amount / total_cost)}%" if total_cost else "0%"
         
-        # Simulate cost calculation
         costs = {
-            "equipment_costs": 5000,
-            "reagent_costs": 2000,
-            "personnel_costs": 10000,
-            "overhead_costs": 3000,
-            "total_cost": 20000,
+            "equipment_costs": round(equipment_costs, 2),
+            "reagent_costs": round(reagent_costs, 2),
+            "personnel_costs": round(personnel_costs, 2),
+            "overhead_costs": round(overhead_costs, 2),
+            "total_cost": round(total_cost, 2),
             "cost_breakdown": {
-                "equipment": "25%",
-                "reagents": "10%",
-                "personnel": "50%",
-                "overhead": "15%"
-            }
+                "equipment": share(equipment_costs),
+                "reagents": share(reagent_costs),
+                "personnel": share(personnel_costs),
+                "overhead": share(overhead_costs)
+            },
+            "category_costs": {name: round(value, 2) for name, value in by_category.items()},
+            "missing_skus": missing_skus
         }
+        if catalog is not None and "price_categories" in parameters:
+            # Catalog-wide what-if for the requested categories only, via the category row index
+            costs["catalog_category_totals"] = {
+                name: round(value, 2)
+                for name, value in catalog.category_totals(scenario, parameters["price_categories"]).items()
+            }
         
         return costs
 
-    def plan_timeline(self, query: str, databases: List[str]) -> Dict[str, Any]:
+    def plan_timeline(self, query: str, databases: List[str],
+                      parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Plan project timeline"""
-        logger.info("Planning project timeline")
+        logger.debug("Planning project timeline")
+        parameters = parameters or {}
         
-        # Simulate timeline planning
-        timeline = {
-            "total_duration": 30,
-            "phases": [
-                {
-                    "name": "Planning",
-                    "duration": 5,
-                    "tasks": ["Protocol development", "Resource allocation"]
-                },
-                {
-                    "name": "Execution",
-                    "duration": 20,
-                    "tasks": ["Data collection", "Analysis"]
-                },
-                {
-                    "name": "Reporting",
-                    "duration": 5,
-                    "tasks": ["Report writing", "Documentation"]
-                }
-            ],
-            "milestones": [
-                {"day": 5, "description": "Protocol approval"},
-                {"day": 25, "description": "Data collection complete"},
-                {"day": 30, "description": "Final report due"}
-            ]
-        }
+        tasks = [Task.from_dict(task) for task in parameters.get("tasks", DEFAULT_TASKS)]
+        schedule = ProjectSchedule(tasks, parameters.get("resources"))
+        
+        # Re-plan incrementally for any duration changes supplied with the request
+        for task_id, duration in parameters.get("duration_updates", {}).items():
+            schedule.update_duration(str(task_id), duration)
+        
+        timeline = schedule.summary()
         
         return timeline
 
-    def assess_risks(self, query: str, databases: List[str]) -> Dict[str, Any]:
+    def assess_risks(self, query: str, databases: List[str],
+                     parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Assess project risks"""
-        logger.info("Assessing project risks")
+        logger.debug("Assessing project risks")
+        parameters = parameters or {}
+        
+        risks = [Risk.from_dict(risk) for risk in parameters.get("risks", DEFAULT_RISKS)]
+        loss_tolerance = float(parameters.get("loss_tolerance", 100_000))
+        if loss_tolerance <= 0:
+            raise ValueError(f"loss_tolerance must be positive, got {loss_tolerance}")
+        samples = int(parameters.get("samples", 100_000))
+        approximate = False
+        if "time_budget" in parameters:
+            # Shrink the sample count to what fits in half the remaining time
+            affordable = int(parameters["time_budget"] * 0.5 * RISK_SAMPLES_PER_SECOND / len(risks))
+            if affordable < samples:
+                samples = max(affordable, MIN_RISK_SAMPLES)
+                approximate = True
+        config = SimulationConfig(
+            samples=samples,
+            seed=parameters.get("seed"),
+            chunk_size=int(parameters.get("chunk_size", 250_000)),
+            workers=int(parameters.get("workers", os.cpu_count() or 1))
+        )
+        simulation = simulate(risks, config, parameters.get("correlation"), parameters.get("deadline"))
         
-        # Simulate risk assessment
-        risks = {
-            "risk_level": "LOW",
+        # Score the 95th percentile loss against the project's loss tolerance
+        risk_score = min(100, round(100 * simulation["percentiles"]["p95"] / loss_tolerance))
+        
+        def level(value: float, medium: float, high: float) -> str:
+            if value >= high:
+                return "HIGH"
+            if value >= medium:
+                return "MEDIUM"
+            return "LOW"
+        
+        risks_assessed = {
+            "risk_level": level(risk_score, 25, 60),
             "identified_risks": [
                 {
-                    "risk": "Equipment failure",
-                    "probability": "LOW",
-                    "impact": "MEDIUM",
-                    "mitigation": "Regular maintenance and backup equipment"
-                },
-                {
-                    "risk": "Data loss",
-                    "probability": "LOW",
-                    "impact": "HIGH",
-                    "mitigation": "Regular backups and redundant storage"
+                    "risk": risk.risk,
+                    "probability": level(risk.probability, 0.2, 0.5),
+                    "impact": level(risk.mean_impact() / loss_tolerance, 0.1, 0.3),
+                    "mitigation": risk.mitigation,
+                    "expected_loss": round(contribution["expected_loss"], 2),
+                    "share_of_expected_loss": round(contribution["share"], 4)
                 }
+                for risk, contribution in zip(risks, simulation["contributions"])
             ],
-            "risk_score": 15
+            "risk_score": risk_score,
+            "simulation": {
+                "samples": simulation["samples"],
+                "approximate": approximate or simulation["truncated"],
+                "expected_loss": round(simulation["expected_loss"], 2),
+                "percentiles": {k: round(v, 2) for k, v in simulation["percentiles"].items()},
+                "cvar_95": round(simulation["cvar_95"], 2),
+                "probability_of_loss": round(simulation["probability_of_loss"], 4)
+            }
         }
         
-        return risks
+        return risks_assessed
 
-    def control_quality(self, query: str, databases: List[str]) -> Dict[str, Any]:
+    def control_quality(self, query: str, databases: List[str],
+                        parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Control quality processes"""
-        logger.info("Controlling quality processes")
+        logger.debug("Controlling quality processes")
+        parameters = parameters or {}
+        monitor_key = f"{parameters.get('lab', 'default')}/{parameters.get('instrument', 'default')}"
         
-        # Simulate quality control
-        quality = {
-            "quality_metrics": {
+        with self._qc_lock:
+            if self.qc_state_dir:
+                path = os.path.join(self.qc_state_dir, quote(monitor_key, safe='') + '.json')
+                with persistent_monitor(path) as monitor:
+                    return self._evaluate_qc(monitor, monitor_key, parameters, persisted=True)
+            monitor = self.qc_monitors.setdefault(monitor_key, WestgardMonitor())
+            return self._evaluate_qc(monitor, monitor_key, parameters, persisted=False)
+
+    def _evaluate_qc(self, monitor: WestgardMonitor, monitor_key: str,
+                     parameters: Dict[str, Any], persisted: bool) -> Dict[str, Any]:
+        limits = parameters.get("control_limits", {})
+        errors = {}
+        for analyte, values in parameters.get("series", {}).items():
+            analyte_limits = limits.get(analyte, {})
+            try:
+                monitor.backfill(analyte, values, analyte_limits.get("mean"), analyte_limits.get("sd"))
+            except ValueError as e:
+                errors[analyte] = str(e)
+        
+        for measurement in parameters.get("measurements", []):
+            analyte = measurement["analyte"]
+            if analyte in errors:
+                continue
+            if analyte not in monitor.analytes:
+                if "mean" not in limits.get(analyte, {}) or "sd" not in limits.get(analyte, {}):
+                    errors[analyte] = f"No control limits or baseline series for analyte {analyte}"
+                    continue
+                try:
+                    monitor.configure(analyte, limits[analyte]["mean"], limits[analyte]["sd"])
+                except ValueError as e:
+                    errors[analyte] = str(e)
+                    continue
+            monitor.ingest(analyte, measurement["value"])
+        
+        states = list(monitor.analytes.values())
+        if states:
+            # Accuracy from bias, precision from CV, reproducibility from accepted runs;
+            # bias and CV are undefined when every mean is zero
+            biases = [abs(s.observed_mean - s.mean) / abs(s.mean) for s in states if s.mean]
+            cvs = [s.observed_sd / abs(s.observed_mean) for s in states if s.observed_mean]
+            accepted = 1 - sum(s.rejected_points for s in states) / max(sum(s.count for s in states), 1)
+            quality_metrics = {
+                "accuracy": round(float(100 * (1 - np.mean(biases))), 1) if biases else None,
+                "precision": round(float(100 * (1 - np.mean(cvs))), 1) if cvs else None,
+                "reproducibility": round(float(100 * accepted), 1)
+            }
+        else:
+            quality_metrics = {
                 "accuracy": 95,
                 "precision": 92,
                 "reproducibility": 88
-            },
+            }
+        
+        quality = {
+            "quality_metrics": quality_metrics,
+            "westgard": [state.summary() for state in states],
+            "westgard_errors": errors,
+            "qc_monitor": {"key": monitor_key, "persisted": persisted},
             "quality_controls": [
                 "Standard reference materials",
                 "Blind sample analysis",
@@ -622,10 +1096,16 @@ class BiomniAgent:
 
     def combine_results(self, results: Dict[str, Any], category: str) -> Dict[str, Any]:
         """Combine results from multiple tools"""
+        incomplete = [
+            tool for tool, result in results.items()
+            if result.get("status") in (PENDING, TIMED_OUT)
+        ]
         combined = {
             "category": category,
             "tools_used": list(results.keys()),
             "results": results,
+            "partial": bool(incomplete),
+            "incomplete_tools": incomplete,
             "summary": self.generate_summary(results, category),
             "recommendations": self.generate_recommendations(results, category)
         }
@@ -653,6 +1133,13 @@ class BiomniAgent:
         """Generate recommendations based on results"""
         recommendations = []
         
+        # Only reason over tools that actually produced an answer
+        incomplete = [
+            tool for tool, result in results.items()
+            if "error" in result or result.get("status") in (PENDING, TIMED_OUT)
+        ]
+        results = {tool: result for tool, result in results.items() if tool not in incomplete}
+        
         if "safety_checker" in results:
             if results["safety_checker"].get("compliance_status") == "COMPLIANT":
                 recommendations.append("Maintain current safety protocols")
@@ -674,6 +1161,9 @@ class BiomniAgent:
             if quality < 80:
                 recommendations.append("Improve image quality for better analysis")
         
+        if incomplete:
+            recommendations.append(f"Re-run without a deadline for complete results from: {', '.join(incomplete)}")
+        
         return recommendations
 
     def health_check(self) -> Dict[str, Any]:
@@ -691,6 +1181,8 @@ class BiomniAgent:
                 "Research assistance",
                 "Data analysis"
             ],
+            "tool_pool": self.tool_pool.stats() if self.tool_pool is not None else None,
+            "profiler": self.profiler.stats() if self.profiler is not None else None,
             "timestamp": time.time()
         }
 
@@ -700,11 +1192,42 @@ def main():
     parser.add_argument('--tools', required=True, help='Comma-separated list of tools')
     parser.add_argument('--databases', required=True, help='Comma-separated list of databases')
     parser.add_argument('--category', required=True, help='Query category')
+    parser.add_argument('--image-fd', type=int, help='Inherited file descriptor holding an encoded image')
+    parser.add_argument('--image-shm', help='Shared-memory segment name holding an encoded image')
+    parser.add_argument('--image-path', help='Temp file with an encoded image to memory-map')
+    parser.add_argument('--image-size', type=int, help='Encoded image length in bytes')
+    parser.add_argument('--image-offset', type=int, default=0, help='Byte offset of the image in its source')
+    parser.add_argument('--pool-workers', type=int, help='Worker processes for CPU-bound tools (0 disables)')
+    parser.add_argument('--record-traffic', default=os.getenv('BIOMNI_TRAFFIC_LOG'),
+                        help='Append an anonymised record of this query to a traffic log')
+    parser.add_argument('--profile', metavar='DIR', default=os.getenv('BIOMNI_PROFILE_DIR'),
+                        help='Write per-tool cProfile/tracemalloc reports to DIR')
+    parser.add_argument('--profile-rate', type=float, default=float(os.getenv('BIOMNI_PROFILE_RATE', '1.0')),
+                        help='Fraction of tool calls to profile (e.g. 0.01 in production)')
+    parser.add_argument('--route', choices=['explicit', 'auto'], default=os.getenv('BIOMNI_ROUTING', 'explicit'),
+                        help="'auto' runs only the listed tools relevant to the query (--tools auto for all)")
+    parser.add_argument('--max-tools', type=int, help='Upper bound on tools kept by auto routing')
+    parser.add_argument('--timeout', type=float, help='Seconds to wait before returning partial results')
+    parser.add_argument('--request-id', help='Trace id attached to every log record for this query')
+    parser.add_argument('--parameters', default='{}', help='JSON object of per-tool parameters keyed by tool name')
     parser.add_argument('--health', action='store_true', help='Perform health check')
     
     args = parser.parse_args()
     
-    agent = BiomniAgent()
+    configure_logging()
+    pool_config = PoolConfig.from_env()
+    if args.pool_workers is not None:
+        pool_config.workers = args.pool_workers
+    tool_pool = None
+    if pool_config.workers > 0:
+        # Workers build their own profiler so pooled tools are profiled as well
+        pool_config.profile_dir = args.profile
+        pool_config.profile_rate = args.profile_rate
+        tool_pool = ToolProcessPool(pool_config)
+        tool_pool.start()
+    traffic_recorder = TrafficRecorder(args.record_traffic) if args.record_traffic else None
+    profiler = ToolProfiler(args.profile, sample_rate=args.profile_rate) if args.profile else None
+    agent = BiomniAgent(tool_pool=tool_pool, traffic_recorder=traffic_recorder, profiler=profiler)
     
     if args.health:
         result = agent.health_check()
@@ -715,22 +1238,38 @@ def main():
     tools = [tool.strip() for tool in args.tools.split(',')]
     databases = [db.strip() for db in args.databases.split(',')]
     
+    image = None
+    for kind, ref in (('fd', args.image_fd), ('shm', args.image_shm), ('path', args.image_path)):
+        if ref is not None:
+            image = ImageSource(kind=kind, ref=str(ref), size=args.image_size, offset=args.image_offset)
+    
     # Create query
     query = BiomniQuery(
         query=args.query,
         tools=tools,
         databases=databases,
-        category=args.category
+        category=args.category,
+        parameters=json.loads(args.parameters),
+        request_id=args.request_id,
+        image=image,
+        deadline=time.time() + args.timeout if args.timeout is not None else None,
+        routing=args.route,
+        max_tools=args.max_tools
     )
     
     # Execute query
     result = agent.execute_query(query)
     
-    # Output result
+    # Output result before tearing down the pool, so a tool dropped at the
+    # deadline cannot hold back the answer
     if result.success:
         print(json.dumps(asdict(result), indent=2))
     else:
         print(json.dumps({"error": result.error}, indent=2))
+    sys.stdout.flush()
+    if tool_pool is not None:
+        tool_pool.shutdown(wait=False)
+    if not result.success:
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,305 @@
+"""
+LabGuard Pro Compliance Rules
+Declarative regulatory and safety rules compiled into an indexed decision
+structure, used by the Biomni compliance_validator and safety_checker tools
+"""
+
+import json
+import operator
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+SEVERITY_WEIGHTS = {'LOW': 1, 'MEDIUM': 3, 'HIGH': 5, 'CRITICAL': 10}
+
+_MISSING = object()
+
+
+def _days_since(value: Any, today: date) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return (today - datetime.fromisoformat(str(value)).date()).days
+    except ValueError:
+        return None
+
+
+def _within_days(value: Any, limit: Any, today: date) -> bool:
+    age = _days_since(value, today)
+    return age is not None and 0 <= age <= limit
+
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda actual, expected: actual in expected,
+    'not_in': lambda actual, expected: actual not in expected,
+}
+
+
+@dataclass(frozen=True)
+class Condition:
+    field: str
+    op: str
+    value: Any = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Condition':
+        if data['op'] not in OPERATORS and data['op'] not in ('exists', 'missing', 'within_days'):
+            raise ValueError(f"Unknown rule operator: {data['op']}")
+        value = data.get('value')
+        if isinstance(value, list):
+            value = tuple(value)
+        return cls(field=data['field'], op=data['op'], value=value)
+
+    def evaluate(self, record: Dict[str, Any], today: date) -> bool:
+        actual = record.get(self.field, _MISSING)
+        if self.op == 'exists':
+            return actual is not _MISSING and actual is not None
+        if self.op == 'missing':
+            return actual is _MISSING or actual is None
+        if actual is _MISSING or actual is None:
+            return False
+        if self.op == 'within_days':
+            return _within_days(actual, self.value, today)
+        try:
+            return OPERATORS[self.op](actual, self.value)
+        except TypeError:
+            return False
+
+
+@dataclass
+class Rule:
+    id: str
+    description: str
+    record_type: str
+    domain: str = 'compliance'
+    severity: str = 'MEDIUM'
+    when: List[Condition] = field(default_factory=list)
+    require: List[Condition] = field(default_factory=list)
+    action: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Rule':
+        return cls(
+            id=data['id'],
+            description=data['description'],
+            record_type=data['record_type'],
+            domain=data.get('domain', 'compliance'),
+            severity=data.get('severity', 'MEDIUM').upper(),
+            when=[Condition.from_dict(c) for c in data.get('when', [])],
+            require=[Condition.from_dict(c) for c in data.get('require', [])],
+            action=data.get('action')
+        )
+
+    @property
+    def fields(self) -> Set[str]:
+        return {c.field for c in self.when} | {c.field for c in self.require}
+
+
+class CompiledRules:
+    """Rules bucketed by record type, discriminating equality test and tested field"""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        self.conditions: List[Condition] = []
+        condition_ids: Dict[Condition, int] = {}
+
+        def intern(condition: Condition) -> int:
+            if condition not in condition_ids:
+                condition_ids[condition] = len(self.conditions)
+                self.conditions.append(condition)
+            return condition_ids[condition]
+
+        # Each rule becomes (rule index, when condition ids, require condition ids)
+        self.compiled: List[Tuple[int, Tuple[int, ...], Tuple[int, ...]]] = [
+            (index, tuple(intern(c) for c in rule.when), tuple(intern(c) for c in rule.require))
+            for index, rule in enumerate(rules)
+        ]
+
+        # A rule with an equality "when" test is only reachable through that
+        # (field, value) pair; everything else is checked for every record of its type.
+        self.always: Dict[str, List[int]] = defaultdict(list)
+        self.by_value: Dict[str, Dict[Tuple[str, Any], List[int]]] = defaultdict(lambda: defaultdict(list))
+        self.by_field: Dict[str, Dict[str, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        for index, rule in enumerate(rules):
+            discriminator = next(
+                (c for c in rule.when if c.op == '==' and _hashable(c.value)), None
+            )
+            if discriminator is None:
+                self.always[rule.record_type].append(index)
+            else:
+                self.by_value[rule.record_type][(discriminator.field, discriminator.value)].append(index)
+            for field_name in rule.fields:
+                self.by_field[rule.record_type][field_name].add(index)
+
+    @classmethod
+    def from_dicts(cls, rules: List[Dict[str, Any]]) -> 'CompiledRules':
+        return cls([Rule.from_dict(rule) for rule in rules])
+
+    def candidates(self, record: Dict[str, Any]) -> List[int]:
+        """Indexes of rules that can apply to this record"""
+        record_type = record.get('type')
+        found = list(self.always.get(record_type, ()))
+        buckets = self.by_value.get(record_type)
+        if buckets:
+            for field_name, value in record.items():
+                if _hashable(value):
+                    found.extend(buckets.get((field_name, value), ()))
+        return found
+
+    def evaluate(self, record: Dict[str, Any], rule_indexes: List[int],
+                 today: date) -> Tuple[Set[int], Set[int]]:
+        """Return (applicable, violated) rule indexes, evaluating each condition once"""
+        cache: Dict[int, bool] = {}
+
+        def check(condition_id: int) -> bool:
+            if condition_id not in cache:
+                cache[condition_id] = self.conditions[condition_id].evaluate(record, today)
+            return cache[condition_id]
+
+        applicable, violated = set(), set()
+        for index in rule_indexes:
+            _, when, require = self.compiled[index]
+            if all(check(c) for c in when):
+                applicable.add(index)
+                if not all(check(c) for c in require):
+                    violated.add(index)
+        return applicable, violated
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class ComplianceState:
+    """Per-record rule outcomes maintained incrementally as records change"""
+
+    def __init__(self, rules: CompiledRules, today: Optional[date] = None):
+        self.rules = rules
+        self.today = today or date.today()
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.applicable: Dict[str, Set[int]] = {}
+        self.violations: Dict[str, Set[int]] = {}
+
+    def add_record(self, record: Dict[str, Any]) -> Set[int]:
+        """Check a new record against its candidate rules only"""
+        record_id = str(record.get('id', len(self.records)))
+        self.records[record_id] = dict(record)
+        applicable, violated = self.rules.evaluate(record, self.rules.candidates(record), self.today)
+        self.applicable[record_id] = applicable
+        self.violations[record_id] = violated
+        return violated
+
+    def update_record(self, record_id: str, changes: Dict[str, Any]) -> Set[int]:
+        """Apply field changes and re-evaluate only rules that test those fields"""
+        record = self.records[record_id]
+        record.update(changes)
+        by_field = self.rules.by_field.get(record.get('type'), {})
+        affected = set().union(*(by_field.get(name, set()) for name in changes))
+        affected &= set(self.rules.candidates(record)) | self.applicable[record_id]
+        applicable, violated = self.rules.evaluate(record, sorted(affected), self.today)
+        self.applicable[record_id] = (self.applicable[record_id] - affected) | applicable
+        self.violations[record_id] = (self.violations[record_id] - affected) | violated
+        return self.violations[record_id]
+
+    def remove_record(self, record_id: str) -> None:
+        self.records.pop(record_id)
+        self.applicable.pop(record_id)
+        self.violations.pop(record_id)
+
+    def report(self, domain: str) -> Dict[str, Any]:
+        """Weighted score and violation list for one rule domain"""
+        checked = 0
+        failed = 0
+        findings = []
+        for record_id, applicable in self.applicable.items():
+            for index in applicable:
+                rule = self.rules.rules[index]
+                if rule.domain != domain:
+                    continue
+                weight = SEVERITY_WEIGHTS.get(rule.severity, 1)
+                checked += weight
+                if index in self.violations[record_id]:
+                    failed += weight
+                    findings.append({
+                        "rule": rule.id,
+                        "record": record_id,
+                        "severity": rule.severity,
+                        "description": rule.description,
+                        "action": rule.action
+                    })
+        findings.sort(key=lambda f: -SEVERITY_WEIGHTS.get(f["severity"], 1))
+        score = round(100 * (1 - failed / checked)) if checked else 100
+        return {"checked": checked, "score": score, "findings": findings}
+
+
+DEFAULT_RULES = [
+    {
+        "id": "EQ-CAL-001", "record_type": "equipment", "severity": "HIGH",
+        "description": "Equipment must have a calibration within its calibration interval",
+        "when": [{"field": "requires_calibration", "op": "==", "value": True}],
+        "require": [{"field": "last_calibrated", "op": "within_days", "value": 365}],
+        "action": "Schedule calibration"
+    },
+    {
+        "id": "EQ-SOP-001", "record_type": "equipment", "severity": "MEDIUM",
+        "description": "Equipment must reference a Standard Operating Procedure",
+        "require": [{"field": "sop_id", "op": "exists"}],
+        "action": "Link equipment to its SOP"
+    },
+    {
+        "id": "CAL-REC-001", "record_type": "calibration", "severity": "HIGH",
+        "description": "Calibration records must pass and be signed off",
+        "require": [
+            {"field": "result", "op": "==", "value": "PASS"},
+            {"field": "signed_by", "op": "exists"}
+        ],
+        "action": "Review failed or unsigned calibration"
+    },
+    {
+        "id": "TRN-001", "record_type": "training", "severity": "MEDIUM",
+        "description": "Training must be renewed annually",
+        "require": [{"field": "completed_on", "op": "within_days", "value": 365}],
+        "action": "Renew training"
+    },
+    {
+        "id": "SAF-BSC-001", "record_type": "equipment", "domain": "safety", "severity": "CRITICAL",
+        "description": "Biosafety cabinets must be certified within the last year",
+        "when": [{"field": "equipment_type", "op": "==", "value": "biosafety_cabinet"}],
+        "require": [{"field": "certified_on", "op": "within_days", "value": 365}],
+        "action": "Take cabinet out of service until certified"
+    },
+    {
+        "id": "SAF-HOOD-001", "record_type": "equipment", "domain": "safety", "severity": "HIGH",
+        "description": "Fume hood face velocity must be between 80 and 120 fpm",
+        "when": [{"field": "equipment_type", "op": "==", "value": "fume_hood"}],
+        "require": [
+            {"field": "face_velocity_fpm", "op": ">=", "value": 80},
+            {"field": "face_velocity_fpm", "op": "<=", "value": 120}
+        ],
+        "action": "Service fume hood airflow"
+    },
+    {
+        "id": "SAF-TRN-001", "record_type": "training", "domain": "safety", "severity": "HIGH",
+        "description": "Chemical hygiene training must be current",
+        "when": [{"field": "course", "op": "==", "value": "chemical_hygiene"}],
+        "require": [{"field": "completed_on", "op": "within_days", "value": 365}],
+        "action": "Restrict chemical handling until retrained"
+    }
+]
+
+
+def load_rules(path: str) -> List[Dict[str, Any]]:
+    """Read a JSON list of rule definitions"""
+    with open(path) as handle:
+        return json.load(handle)
@@ -0,0 +1,163 @@
+"""
+LabGuard Pro Cost Catalog
+Columnar, indexed equipment and reagent catalog with vectorized cost
+roll-ups and copy-free what-if repricing for the cost_calculator tool
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+KINDS = ['equipment', 'reagent']
+
+
+@dataclass
+class PriceScenario:
+    """What-if repricing applied on read; the catalog arrays are never copied"""
+    category_multipliers: Dict[str, float] = field(default_factory=dict)
+    kind_multipliers: Dict[str, float] = field(default_factory=dict)
+    sku_prices: Dict[str, float] = field(default_factory=dict)
+    global_multiplier: float = 1.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PriceScenario':
+        return cls(
+            category_multipliers={k: float(v) for k, v in data.get('category_multipliers', {}).items()},
+            kind_multipliers={k: float(v) for k, v in data.get('kind_multipliers', {}).items()},
+            sku_prices={str(k): float(v) for k, v in data.get('sku_prices', {}).items()},
+            global_multiplier=float(data.get('global_multiplier', 1.0))
+        )
+
+
+class CostCatalog:
+    """Struct-of-arrays catalog with hash indexes on SKU and category"""
+
+    def __init__(self, skus: Sequence[str], categories: Sequence[str],
+                 category_codes: np.ndarray, kind_codes: np.ndarray,
+                 unit_prices: np.ndarray):
+        self.skus = list(skus)
+        self.categories = list(categories)
+        self.category_codes = category_codes
+        self.kind_codes = kind_codes
+        self.unit_prices = unit_prices
+
+        self.sku_index = {sku: row for row, sku in enumerate(self.skus)}
+        if len(self.sku_index) != len(self.skus):
+            raise ValueError("Catalog SKUs must be unique")
+        self.category_index = {name: code for code, name in enumerate(self.categories)}
+        order = np.argsort(self.category_codes, kind='stable')
+        bounds = np.searchsorted(self.category_codes[order], np.arange(len(self.categories) + 1))
+        self._category_rows = {
+            name: order[bounds[code]:bounds[code + 1]]
+            for code, name in enumerate(self.categories)
+        }
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'CostCatalog':
+        """Build a catalog from {sku, category, kind, unit_price} records"""
+        categories: Dict[str, int] = {}
+        category_codes = np.empty(len(records), dtype=np.int32)
+        kind_codes = np.empty(len(records), dtype=np.int8)
+        unit_prices = np.empty(len(records), dtype=np.float64)
+        for row, record in enumerate(records):
+            category_codes[row] = categories.setdefault(record.get('category', 'uncategorized'), len(categories))
+            kind = record.get('kind', 'reagent')
+            if kind not in KINDS:
+                raise ValueError(f"Unknown kind {kind!r} for SKU {record['sku']}; expected one of {KINDS}")
+            kind_codes[row] = KINDS.index(kind)
+            unit_prices[row] = float(record['unit_price'])
+        return cls([str(r['sku']) for r in records], list(categories), category_codes, kind_codes, unit_prices)
+
+    @classmethod
+    def load(cls, directory: str) -> 'CostCatalog':
+        """Open a saved catalog with its numeric columns memory-mapped read-only"""
+        with open(os.path.join(directory, 'catalog.json')) as handle:
+            meta = json.load(handle)
+        return cls(
+            meta['skus'],
+            meta['categories'],
+            np.load(os.path.join(directory, 'category_codes.npy'), mmap_mode='r'),
+            np.load(os.path.join(directory, 'kind_codes.npy'), mmap_mode='r'),
+            np.load(os.path.join(directory, 'unit_prices.npy'), mmap_mode='r')
+        )
+
+    def save(self, directory: str) -> None:
+        """Write the catalog as .npy columns plus a JSON key file"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'category_codes.npy'), np.asarray(self.category_codes))
+        np.save(os.path.join(directory, 'kind_codes.npy'), np.asarray(self.kind_codes))
+        np.save(os.path.join(directory, 'unit_prices.npy'), np.asarray(self.unit_prices))
+        with open(os.path.join(directory, 'catalog.json'), 'w') as handle:
+            json.dump({'skus': self.skus, 'categories': self.categories}, handle)
+
+    def __len__(self) -> int:
+        return len(self.skus)
+
+    def rows_for_skus(self, skus: Sequence[str]) -> np.ndarray:
+        """Row numbers for SKUs, -1 for SKUs missing from the catalog"""
+        return np.fromiter((self.sku_index.get(sku, -1) for sku in skus), dtype=np.int64, count=len(skus))
+
+    def rows_for_category(self, category: str) -> np.ndarray:
+        return self._category_rows.get(category, np.empty(0, dtype=np.int64))
+
+    def prices(self, rows: np.ndarray, scenario: Optional[PriceScenario] = None) -> np.ndarray:
+        """Effective unit prices for the given rows under an optional scenario"""
+        prices = self.unit_prices[rows]
+        if scenario is None:
+            return prices
+
+        multiplier = np.full(len(self.categories), scenario.global_multiplier)
+        for category, value in scenario.category_multipliers.items():
+            if category in self.category_index:
+                multiplier[self.category_index[category]] *= value
+        kind_multiplier = np.array([scenario.kind_multipliers.get(kind, 1.0) for kind in KINDS])
+        prices = prices * multiplier[self.category_codes[rows]] * kind_multiplier[self.kind_codes[rows]]
+
+        if scenario.sku_prices:
+            override_rows = self.rows_for_skus(list(scenario.sku_prices))
+            override_prices = np.fromiter(scenario.sku_prices.values(), dtype=np.float64,
+                                          count=len(override_rows))
+            known = override_rows >= 0
+            order = np.argsort(override_rows[known])
+            sorted_rows = override_rows[known][order]
+            if len(sorted_rows):
+                positions = np.minimum(np.searchsorted(sorted_rows, rows), len(sorted_rows) - 1)
+                hits = sorted_rows[positions] == rows
+                prices[hits] = override_prices[known][order][positions[hits]]
+        return prices
+
+    def roll_up(self, skus: Sequence[str], quantities: Sequence[float],
+                scenario: Optional[PriceScenario] = None) -> Dict[str, Any]:
+        """Vectorized line-item totals grouped by kind and category"""
+        rows = self.rows_for_skus(skus)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        missing = [sku for sku, row in zip(skus, rows) if row < 0]
+        found = rows >= 0
+        rows, quantities = rows[found], quantities[found]
+
+        line_totals = self.prices(rows, scenario) * quantities
+        by_kind = np.bincount(self.kind_codes[rows], weights=line_totals, minlength=len(KINDS))
+        by_category = np.bincount(self.category_codes[rows], weights=line_totals, minlength=len(self.categories))
+
+        return {
+            'by_kind': {kind: float(by_kind[code]) for code, kind in enumerate(KINDS)},
+            'by_category': {
+                self.categories[code]: float(total)
+                for code, total in enumerate(by_category) if total
+            },
+            'line_totals': line_totals,
+            'missing_skus': missing
+        }
+
+    def category_totals(self, scenario: Optional[PriceScenario] = None,
+                        categories: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """Sum of unit prices per category; only the named categories' rows are repriced"""
+        if categories is None:
+            categories = self.categories
+        return {
+            name: float(self.prices(self.rows_for_category(name), scenario).sum())
+            for name in categories
+        }
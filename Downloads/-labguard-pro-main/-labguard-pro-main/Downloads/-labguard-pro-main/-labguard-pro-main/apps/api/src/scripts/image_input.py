@@ -0,0 +1,136 @@
+"""
+LabGuard Pro Image Input
+Zero-copy access to encoded image payloads handed over by the API service
+through a file descriptor, a shared-memory segment or a memory-mapped file
+"""
+
+import mmap
+import os
+import stat
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, Optional
+
+import cv2
+import numpy as np
+
+SOURCE_KINDS = ('fd', 'shm', 'path')
+
+
+@dataclass
+class ImageSource:
+    """Where the encoded image bytes live; size trims page-rounded segments"""
+    kind: str
+    ref: str
+    size: Optional[int] = None
+    offset: int = 0
+
+    def __post_init__(self):
+        if self.kind not in SOURCE_KINDS:
+            raise ValueError(f"Unknown image source kind: {self.kind}")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ImageSource':
+        return cls(kind=data['kind'], ref=str(data['ref']),
+                   size=data.get('size'), offset=int(data.get('offset', 0)))
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    # The segment belongs to the API service; never let this process unlink it
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        segment = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        except Exception:
+            pass
+        return segment
+
+
+def _release(buffer: Any) -> None:
+    # A caller still holding the yielded array keeps the buffer exported; leave the
+    # release to garbage collection rather than masking whatever is propagating
+    try:
+        buffer.release() if isinstance(buffer, memoryview) else buffer.close()
+    except BufferError:
+        pass
+
+
+def _require_bytes(length: int, source: ImageSource) -> None:
+    if length <= 0:
+        raise ValueError(f"Image source {source.kind}:{source.ref} is empty")
+
+
+def _read_stream(fd: int, offset: int, size: Optional[int]) -> bytes:
+    """Read a pipe or socket to EOF (or offset + size bytes); these cannot be mapped"""
+    limit = None if size is None else offset + size
+    chunks = []
+    total = 0
+    while limit is None or total < limit:
+        chunk = os.read(fd, 1 << 20 if limit is None else min(1 << 20, limit - total))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        total += len(chunk)
+    return b''.join(chunks)[offset:]
+
+
+@contextmanager
+def open_encoded(source: ImageSource) -> Iterator[np.ndarray]:
+    """Yield a read-only uint8 view over the encoded bytes without copying them"""
+    if source.kind == 'shm':
+        segment = _attach_shared_memory(source.ref)
+        try:
+            end = segment.size if source.size is None else source.offset + source.size
+            _require_bytes(min(end, segment.size) - source.offset, source)
+            view = segment.buf[source.offset:end]
+            try:
+                yield np.frombuffer(view, dtype=np.uint8)
+            finally:
+                _release(view)
+        finally:
+            _release(segment)
+        return
+
+    if source.kind == 'fd':
+        fd = int(source.ref)
+        close_fd = False
+    else:
+        fd = os.open(source.ref, os.O_RDONLY)
+        close_fd = True
+    try:
+        status = os.fstat(fd)
+        if not stat.S_ISREG(status.st_mode):
+            data = _read_stream(fd, source.offset, source.size)
+            _require_bytes(len(data), source)
+            yield np.frombuffer(data, dtype=np.uint8)
+            return
+        length = status.st_size - source.offset if source.size is None else source.size
+        _require_bytes(length, source)
+        # mmap offsets must be page aligned; map from the enclosing page boundary
+        aligned = source.offset - source.offset % mmap.ALLOCATIONGRANULARITY
+        mapped = mmap.mmap(fd, length + source.offset - aligned, access=mmap.ACCESS_READ, offset=aligned)
+        try:
+            view = memoryview(mapped)[source.offset - aligned:]
+            try:
+                yield np.frombuffer(view, dtype=np.uint8)
+            finally:
+                _release(view)
+        finally:
+            _release(mapped)
+    finally:
+        if close_fd:
+            os.close(fd)
+
+
+def decode_image(source: ImageSource, flags: int = cv2.IMREAD_UNCHANGED) -> np.ndarray:
+    """Decode straight from the shared buffer; only the pixel array is allocated"""
+    with open_encoded(source) as encoded:
+        image = cv2.imdecode(encoded, flags)
+        del encoded
+    if image is None:
+        raise ValueError(f"Could not decode image from {source.kind}:{source.ref}")
+    return image
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+LabGuard Pro Load Replay
+Record anonymised Biomni query traffic and replay it against the agent at
+1x, accelerated or maximum speed for capacity planning
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from pcr_thermo import PRIMER_PATTERN
+
+# Words are hashed; image references (group 1) become a fixed placeholder and
+# primer sequences (group 2) are kept, since the tools parse both from the query text
+TOKEN_PATTERN = re.compile(rf'(image:\S+)|({PRIMER_PATTERN.pattern})|[A-Za-z0-9]+')
+IMAGE_PLACEHOLDER = 'image:replay'
+
+# Encoded size assumed for handed-over images whose length was not known
+DEFAULT_IMAGE_BYTES = 256 * 1024
+
+LATENCY_PERCENTILES = [50, 90, 95, 99]
+
+
+class TrafficRecorder:
+    """Append one anonymised JSON line per query to a traffic log"""
+
+    def __init__(self, path: str, salt: Optional[str] = None, include_parameters: bool = False):
+        self.path = path
+        # A fresh salt per recording unless one is pinned to correlate several logs
+        self.salt = (salt or os.getenv('BIOMNI_TRAFFIC_SALT') or secrets.token_hex(16)).encode()
+        self.include_parameters = include_parameters
+        self._lock = threading.Lock()
+
+    def anonymise(self, text: str) -> str:
+        """Replace every word with a salted hash token of the same length"""
+        def token(match: re.Match) -> str:
+            word = match.group(0)
+            if match.group(1):
+                return IMAGE_PLACEHOLDER
+            if match.group(2):
+                return word
+            digest = hashlib.blake2s(self.salt + word.encode(), digest_size=16).hexdigest()
+            return (digest * (len(word) // len(digest) + 1))[:len(word)]
+        return TOKEN_PATTERN.sub(token, text)
+
+    def record(self, query: Any, arrived: float, tools: List[str]) -> None:
+        """Log a query with the tools that ran for it, after any auto routing"""
+        entry = {
+            "t": arrived,
+            "query": self.anonymise(query.query),
+            "tools": list(tools),
+            "routed": query.routing == 'auto',
+            "databases": list(query.databases),
+            "category": query.category,
+            "parameters": query.parameters if self.include_parameters else {},
+            "timeout": None if query.deadline is None else round(query.deadline - arrived, 3),
+            "image": None if query.image is None else {
+                "kind": query.image.kind,
+                "size": self._image_size(query.image)
+            }
+        }
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock, open(self.path, 'a') as handle:
+            handle.write(line)
+
+    @staticmethod
+    def _image_size(source: Any) -> Optional[int]:
+        if source.size is not None:
+            return source.size
+        if source.kind == 'path':
+            try:
+                return os.path.getsize(source.ref) - source.offset
+            except OSError:
+                return None
+        return None
+
+
+def synthetic_image(size: Optional[int], directory: str) -> str:
+    """Write a noise PNG of roughly the recorded encoded size; noise barely compresses"""
+    import cv2
+    side = max(int(((size or DEFAULT_IMAGE_BYTES) / 3) ** 0.5), 8)
+    path = os.path.join(directory, f"replay_{side}.png")
+    if not os.path.exists(path):
+        cv2.imwrite(path, np.random.default_rng(side).integers(0, 256, (side, side, 3), dtype=np.uint8))
+    return path
+
+
+def load_traffic(path: str) -> List[Dict[str, Any]]:
+    with open(path) as handle:
+        entries = [json.loads(line) for line in handle if line.strip()]
+    return sorted(entries, key=lambda entry: entry["t"])
+
+
+@dataclass
+class ReplayOutcome:
+    scheduled: float
+    finished: float
+    success: bool
+    tool_errors: int = 0
+    tools: List[str] = field(default_factory=list)
+
+
+def _run_inprocess(agent: Any, entry: Dict[str, Any]) -> tuple:
+    from biomni_agent import BiomniQuery
+    from image_input import ImageSource
+    timeout = entry.get("timeout")
+    result = agent.execute_query(BiomniQuery(
+        query=entry["query"],
+        tools=entry["tools"],
+        databases=entry["databases"],
+        category=entry["category"],
+        parameters=entry.get("parameters", {}),
+        image=ImageSource(kind='path', ref=entry["image_path"]) if entry.get("image_path") else None,
+        deadline=None if timeout is None else time.time() + timeout,
+        routing='explicit'
+    ))
+    tool_errors = 0
+    if result.success:
+        tool_errors = sum(1 for r in result.data["results"].values() if isinstance(r, dict) and "error" in r)
+    return result.success, tool_errors
+
+
+def _run_subprocess(script: str, entry: Dict[str, Any], extra_args: List[str]) -> tuple:
+    # Mirrors how the API service spawns the agent for each request
+    args = [sys.executable, script,
+            '--query', entry["query"],
+            '--tools', ','.join(entry["tools"]),
+            '--databases', ','.join(entry["databases"]) or 'none',
+            '--category', entry["category"],
+            '--parameters', json.dumps(entry.get("parameters", {})),
+            # Recorded tools are already routed; BIOMNI_ROUTING must not re-route them
+            '--route', 'explicit']
+    if entry.get("timeout") is not None:
+        args += ['--timeout', str(entry["timeout"])]
+    if entry.get("image_path"):
+        args += ['--image-path', entry["image_path"]]
+    completed = subprocess.run(args + extra_args, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return False, 0
+    results = json.loads(completed.stdout)["data"]["results"]
+    return True, sum(1 for r in results.values() if isinstance(r, dict) and "error" in r)
+
+
+def replay(entries: List[Dict[str, Any]], speed: float, concurrency: int,
+           mode: str = 'inprocess', pool_workers: int = 0) -> Dict[str, Any]:
+    """Drive the agent open-loop; speed 0 sends everything as fast as possible"""
+    if not entries:
+        raise ValueError("Traffic log is empty")
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'biomni_agent.py')
+    agent = tool_pool = None
+    if mode == 'inprocess':
+        from biomni_agent import BiomniAgent
+        from tool_pool import PoolConfig, ToolProcessPool
+        if pool_workers > 0:
+            tool_pool = ToolProcessPool(PoolConfig(workers=pool_workers))
+            tool_pool.start()
+        agent = BiomniAgent(tool_pool=tool_pool)
+    elif mode != 'subprocess':
+        raise ValueError(f"Unknown replay mode: {mode}")
+    extra_args = ['--pool-workers', str(pool_workers)] if pool_workers else []
+
+    # Recorded images are never stored; stand-ins of the same size keep decode cost realistic
+    image_dir = tempfile.mkdtemp(prefix='biomni_replay_')
+    entries = [
+        {**entry, "image_path": synthetic_image(entry["image"].get("size"), image_dir)} if entry.get("image") else entry
+        for entry in entries
+    ]
+
+    first = entries[0]["t"]
+    outcomes: List[ReplayOutcome] = []
+    outcomes_lock = threading.Lock()
+
+    def run(entry: Dict[str, Any], scheduled: float) -> None:
+        try:
+            if agent is not None:
+                success, tool_errors = _run_inprocess(agent, entry)
+            else:
+                success, tool_errors = _run_subprocess(script, entry, extra_args)
+        except Exception:
+            success, tool_errors = False, 0
+        outcome = ReplayOutcome(scheduled, time.perf_counter(), success, tool_errors, entry["tools"])
+        with outcomes_lock:
+            outcomes.append(outcome)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for entry in entries:
+            # Latency is measured from the intended send time, so queueing
+            # behind a saturated agent is counted rather than hidden
+            offset = (entry["t"] - first) / speed if speed > 0 else 0.0
+            scheduled = started + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(run, entry, scheduled)
+    elapsed = time.perf_counter() - started
+
+    if tool_pool is not None:
+        tool_pool.shutdown()
+    shutil.rmtree(image_dir, ignore_errors=True)
+
+    latencies = np.array([(o.finished - o.scheduled) * 1000 for o in outcomes])
+    failures = sum(1 for o in outcomes if not o.success)
+    tool_calls = sum(len(o.tools) for o in outcomes)
+    tool_mix: Dict[str, int] = {}
+    for outcome in outcomes:
+        for tool in outcome.tools:
+            tool_mix[tool] = tool_mix.get(tool, 0) + 1
+
+    return {
+        "mode": mode,
+        "speed": speed or "max",
+        "concurrency": concurrency,
+        "requests": len(outcomes),
+        "duration_s": round(elapsed, 3),
+        "recorded_span_s": round(entries[-1]["t"] - first, 3),
+        "throughput_rps": round(len(outcomes) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            **{f"p{p}": round(float(v), 3) for p, v in zip(LATENCY_PERCENTILES, np.percentile(latencies, LATENCY_PERCENTILES))},
+            "mean": round(float(latencies.mean()), 3),
+            "max": round(float(latencies.max()), 3)
+        },
+        "error_rate": round(failures / len(outcomes), 4),
+        "tool_error_rate": round(sum(o.tool_errors for o in outcomes) / tool_calls, 4) if tool_calls else 0.0,
+        "tool_mix": dict(sorted(tool_mix.items(), key=lambda item: -item[1]))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LabGuard Pro Biomni traffic replay')
+    parser.add_argument('traffic', help='Traffic log written by --record-traffic')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier (0 = max speed)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Maximum in-flight requests')
+    parser.add_argument('--mode', choices=['inprocess', 'subprocess'], default='inprocess',
+                        help='Call the agent in-process or spawn it per request like the API service')
+    parser.add_argument('--pool-workers', type=int, default=0, help='Tool process pool size for the agent')
+    parser.add_argument('--limit', type=int, help='Only replay the first N recorded queries')
+
+    args = parser.parse_args()
+
+    from agent_logging import configure_logging
+    configure_logging()
+
+    entries = load_traffic(args.traffic)
+    if args.limit:
+        entries = entries[:args.limit]
+
+    report = replay(entries, args.speed, args.concurrency, args.mode, args.pool_workers)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+LabGuard Pro PCR Thermodynamics
+Vectorized nearest-neighbour primer melting temperatures and batch
+condition search used by the Biomni pcr_optimizer tool
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Gas constant in cal/(K*mol)
+GAS_CONSTANT = 1.987
+
+# Base encoding used for dinucleotide lookups (A, C, G, T)
+BASE_CODES = {'A': 0, 'C': 1, 'G': 2, 'T': 3}
+PAD_CODE = 4
+
+# SantaLucia (1998) unified nearest-neighbour parameters, indexed by
+# 4 * first_base + second_base. Each stack and its reverse complement share
+# the same entry. Columns are dH (kcal/mol) and dS (cal/K*mol).
+NN_TABLE = np.zeros((16, 2), dtype=np.float64)
+for _stack, _values in {
+    'AA': (-7.9, -22.2), 'TT': (-7.9, -22.2),
+    'AT': (-7.2, -20.4),
+    'TA': (-7.2, -21.3),
+    'CA': (-8.5, -22.7), 'TG': (-8.5, -22.7),
+    'GT': (-8.4, -22.4), 'AC': (-8.4, -22.4),
+    'CT': (-7.8, -21.0), 'AG': (-7.8, -21.0),
+    'GA': (-8.2, -22.2), 'TC': (-8.2, -22.2),
+    'CG': (-10.6, -27.2),
+    'GC': (-9.8, -24.4),
+    'GG': (-8.0, -19.9), 'CC': (-8.0, -19.9),
+}.items():
+    NN_TABLE[4 * BASE_CODES[_stack[0]] + BASE_CODES[_stack[1]]] = _values
+
+# Terminal initiation penalties for G/C and A/T ends
+INIT_GC = (0.1, -2.8)
+INIT_AT = (2.3, 4.1)
+
+PRIMER_PATTERN = re.compile(r'\b[ACGTacgt]{12,60}\b')
+
+
+@dataclass
+class PCRConditionGrid:
+    annealing_temperatures: List[float] = field(
+        default_factory=lambda: [float(t) for t in np.arange(50.0, 72.5, 0.5)]
+    )
+    extension_times: List[float] = field(default_factory=lambda: [15.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0])
+    primer_concentrations: List[float] = field(default_factory=lambda: [0.1, 0.2, 0.3, 0.5, 0.75, 1.0])
+    sodium_mm: float = 50.0
+    magnesium_mm: float = 1.5
+    dntp_mm: float = 0.8
+    extension_rate: float = 1000.0  # bases per minute
+    target_offset: float = 5.0  # degrees below the lower primer Tm
+
+
+# Byte -> base code table; anything outside ACGT maps to PAD_CODE
+_BASE_LOOKUP = np.full(256, PAD_CODE, dtype=np.uint8)
+for _base, _code in BASE_CODES.items():
+    _BASE_LOOKUP[ord(_base)] = _code
+
+
+def encode_primers(primers: Sequence[str]) -> tuple:
+    """Encode primers into a padded code matrix and a length vector"""
+    cleaned = [primer.strip().upper() for primer in primers]
+    if not cleaned:
+        raise ValueError("No primers to encode")
+    lengths = np.fromiter((len(primer) for primer in cleaned), dtype=np.int64, count=len(cleaned))
+    if lengths.min() < 2:
+        raise ValueError("Primers must be at least two bases long")
+    try:
+        joined = ''.join(cleaned).encode('ascii')
+    except UnicodeEncodeError:
+        raise ValueError("Primers may only contain A, C, G and T") from None
+
+    # Decode every base in one lookup, then scatter into the padded matrix
+    flat = _BASE_LOOKUP[np.frombuffer(joined, dtype=np.uint8)]
+    if np.any(flat == PAD_CODE):
+        raise ValueError("Primers may only contain A, C, G and T")
+    starts = np.cumsum(lengths) - lengths
+    rows = np.repeat(np.arange(len(cleaned)), lengths)
+    cols = np.arange(len(flat)) - np.repeat(starts, lengths)
+    codes = np.full((len(cleaned), int(lengths.max())), PAD_CODE, dtype=np.uint8)
+    codes[rows, cols] = flat
+
+    return codes, lengths
+
+
+def gc_content(codes: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Fraction of G/C bases per encoded primer"""
+    gc = ((codes == BASE_CODES['C']) | (codes == BASE_CODES['G'])).sum(axis=1)
+    return gc / np.maximum(lengths, 1)
+
+
+def salt_adjusted_sodium(sodium_mm: float, magnesium_mm: float, dntp_mm: float) -> float:
+    """Monovalent-equivalent cation concentration in mol/L"""
+    free_magnesium = max(magnesium_mm - dntp_mm, 0.0)
+    return (sodium_mm + 120.0 * np.sqrt(free_magnesium)) / 1000.0
+
+
+def nearest_neighbor_thermo(codes: np.ndarray, lengths: np.ndarray) -> tuple:
+    """Sum nearest-neighbour enthalpy and entropy for every encoded primer"""
+    if codes.shape[1] < 2:
+        raise ValueError("Primers must be at least two bases long")
+
+    stacks = 4 * codes[:, :-1].astype(np.int64) + codes[:, 1:]
+    valid = np.arange(codes.shape[1] - 1)[None, :] < (lengths - 1)[:, None]
+    stacks = np.where(valid, stacks, 0)
+
+    values = NN_TABLE[stacks] * valid[..., None]
+    delta_h = values[..., 0].sum(axis=1)
+    delta_s = values[..., 1].sum(axis=1)
+
+    rows = np.arange(codes.shape[0])
+    for end in (codes[:, 0], codes[rows, lengths - 1]):
+        is_at = (end == BASE_CODES['A']) | (end == BASE_CODES['T'])
+        delta_h = delta_h + np.where(is_at, INIT_AT[0], INIT_GC[0])
+        delta_s = delta_s + np.where(is_at, INIT_AT[1], INIT_GC[1])
+
+    return delta_h, delta_s
+
+
+def melting_temperatures(codes: np.ndarray, lengths: np.ndarray,
+                         primer_concentrations_um: Sequence[float],
+                         sodium_m: float) -> np.ndarray:
+    """Tm in degrees C for every primer (rows) at every concentration (columns)"""
+    delta_h, delta_s = nearest_neighbor_thermo(codes, lengths)
+    delta_s = delta_s + 0.368 * (lengths - 1) * np.log(sodium_m)
+
+    concentrations = np.asarray(primer_concentrations_um, dtype=np.float64) * 1e-6
+    denominator = delta_s[:, None] + GAS_CONSTANT * np.log(concentrations / 4.0)[None, :]
+    return 1000.0 * delta_h[:, None] / denominator - 273.15
+
+
+def search_conditions(forward: Sequence[str], reverse: Sequence[str],
+                      amplicon_lengths: Sequence[float],
+                      grid: Optional[PCRConditionGrid] = None) -> Dict[str, Any]:
+    """Score every (pair, concentration, annealing, extension) combination in one pass"""
+    grid = grid or PCRConditionGrid()
+    pair_count = len(forward)
+    if pair_count == 0 or pair_count != len(reverse):
+        raise ValueError("Forward and reverse primer lists must be non-empty and equal in length")
+
+    codes, lengths = encode_primers(list(forward) + list(reverse))
+    sodium = salt_adjusted_sodium(grid.sodium_mm, grid.magnesium_mm, grid.dntp_mm)
+    tm = melting_temperatures(codes, lengths, grid.primer_concentrations, sodium)
+    gc = gc_content(codes, lengths)
+
+    tm_forward, tm_reverse = tm[:pair_count], tm[pair_count:]
+    tm_low = np.minimum(tm_forward, tm_reverse)
+    tm_mismatch = np.abs(tm_forward - tm_reverse)
+
+    annealing = np.asarray(grid.annealing_temperatures, dtype=np.float64)
+    extension = np.asarray(grid.extension_times, dtype=np.float64)
+    required = np.asarray(amplicon_lengths, dtype=np.float64) / grid.extension_rate * 60.0
+
+    # Annealing penalty: distance from the target just below the lower Tm,
+    # doubled when the annealing temperature exceeds the lower Tm outright.
+    target = tm_low - grid.target_offset
+    distance = annealing[None, None, :] - target[:, :, None]
+    annealing_penalty = np.abs(distance) + 2.0 * np.maximum(annealing[None, None, :] - tm_low[:, :, None], 0.0)
+
+    # Extension penalty: heavy for too short, light for wasted time
+    shortfall = np.maximum(required[:, None] - extension[None, :], 0.0)
+    surplus = np.maximum(extension[None, :] - required[:, None], 0.0)
+    extension_penalty = 10.0 * shortfall + 0.05 * surplus
+
+    # Concentration penalty: prefer modest concentrations to limit dimers
+    concentration_penalty = 0.5 * np.asarray(grid.primer_concentrations)[None, :] + 0.25 * tm_mismatch
+
+    score = (annealing_penalty[:, :, :, None]
+             + extension_penalty[:, None, None, :]
+             + concentration_penalty[:, :, None, None])
+
+    flat_best = score.reshape(pair_count, -1).argmin(axis=1)
+    best_c, best_a, best_e = np.unravel_index(flat_best, score.shape[1:])
+
+    plate_best = np.unravel_index(score.sum(axis=0).argmin(), score.shape[1:])
+
+    rows = np.arange(pair_count)
+    return {
+        "tm_forward": tm_forward[rows, best_c],
+        "tm_reverse": tm_reverse[rows, best_c],
+        "gc_forward": gc[:pair_count],
+        "gc_reverse": gc[pair_count:],
+        "annealing_temperature": annealing[best_a],
+        "extension_time": extension[best_e],
+        "primer_concentration": np.asarray(grid.primer_concentrations)[best_c],
+        "penalty": score.reshape(pair_count, -1)[rows, flat_best],
+        "plate": {
+            "primer_concentration": float(grid.primer_concentrations[plate_best[0]]),
+            "annealing_temperature": float(annealing[plate_best[1]]),
+            "extension_time": float(extension[plate_best[2]]),
+        },
+    }
+
+
+def extract_primers(query: str) -> List[str]:
+    """Pull primer-like sequences out of free query text"""
+    return [match.upper() for match in PRIMER_PATTERN.findall(query)]
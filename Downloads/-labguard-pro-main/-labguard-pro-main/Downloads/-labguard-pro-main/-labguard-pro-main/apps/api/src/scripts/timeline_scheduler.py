@@ -0,0 +1,316 @@
+"""
+LabGuard Pro Timeline Scheduler
+Critical-path analysis and resource-levelled list scheduling for lab
+projects, used by the Biomni timeline_planner tool
+"""
+
+import heapq
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+EPSILON = 1e-9
+
+
+@dataclass
+class Task:
+    id: str
+    duration: float
+    name: Optional[str] = None
+    depends_on: List[str] = field(default_factory=list)
+    resources: Dict[str, int] = field(default_factory=dict)
+    phase: Optional[str] = None
+    milestone: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Task':
+        resources = data.get('resources', {})
+        if isinstance(resources, list):
+            resources = {resource: 1 for resource in resources}
+        return cls(
+            id=str(data['id']),
+            duration=float(data['duration']),
+            name=data.get('name'),
+            depends_on=[str(dep) for dep in data.get('depends_on', [])],
+            resources={key: int(value) for key, value in resources.items()},
+            phase=data.get('phase'),
+            milestone=data.get('milestone')
+        )
+
+
+class ProjectSchedule:
+    """Task graph with cached CPM values that can be re-planned incrementally"""
+
+    def __init__(self, tasks: List[Task], capacities: Optional[Dict[str, int]] = None):
+        self.tasks = {task.id: task for task in tasks}
+        if len(self.tasks) != len(tasks):
+            raise ValueError("Task ids must be unique")
+        self.capacities = dict(capacities or {})
+
+        self.successors: Dict[str, List[str]] = defaultdict(list)
+        for task in tasks:
+            for dep in task.depends_on:
+                if dep not in self.tasks:
+                    raise ValueError(f"Task {task.id} depends on unknown task {dep}")
+                self.successors[dep].append(task.id)
+
+        # Undeclared resources get the largest single demand, independent of task order
+        peak_demand: Dict[str, int] = {}
+        for task in tasks:
+            for resource, amount in task.resources.items():
+                peak_demand[resource] = max(peak_demand.get(resource, 0), amount)
+        for resource, amount in peak_demand.items():
+            self.capacities.setdefault(resource, amount)
+
+        for task in tasks:
+            for resource, amount in task.resources.items():
+                capacity = self.capacities[resource]
+                if amount > capacity:
+                    raise ValueError(
+                        f"Task {task.id} needs {amount} {resource} but capacity is {capacity}"
+                    )
+
+        self.order = self._topological_order()
+        self.position = {task_id: index for index, task_id in enumerate(self.order)}
+        self.earliest_start: Dict[str, float] = {}
+        self.latest_start: Dict[str, float] = {}
+        self.makespan = 0.0
+        self._levelled: Optional[Dict[str, float]] = None
+        self._compute_forward(self.order)
+        self._compute_backward(self.order)
+
+    def _topological_order(self) -> List[str]:
+        indegree = {task_id: len(task.depends_on) for task_id, task in self.tasks.items()}
+        ready = [task_id for task_id, degree in indegree.items() if degree == 0]
+        order = []
+        while ready:
+            task_id = ready.pop()
+            order.append(task_id)
+            for succ in self.successors[task_id]:
+                indegree[succ] -= 1
+                if indegree[succ] == 0:
+                    ready.append(succ)
+        if len(order) != len(self.tasks):
+            raise ValueError("Task dependencies contain a cycle")
+        return order
+
+    def _earliest_for(self, task_id: str) -> float:
+        return max(
+            (self.earliest_start[dep] + self.tasks[dep].duration for dep in self.tasks[task_id].depends_on),
+            default=0.0
+        )
+
+    def _latest_for(self, task_id: str) -> float:
+        latest_finish = min(
+            (self.latest_start[succ] for succ in self.successors[task_id]),
+            default=self.makespan
+        )
+        return latest_finish - self.tasks[task_id].duration
+
+    def _compute_forward(self, order: List[str]) -> None:
+        for task_id in order:
+            self.earliest_start[task_id] = self._earliest_for(task_id)
+        self.makespan = max(
+            (self.earliest_start[t] + task.duration for t, task in self.tasks.items()),
+            default=0.0
+        )
+
+    def _compute_backward(self, order: List[str]) -> None:
+        for task_id in reversed(order):
+            self.latest_start[task_id] = self._latest_for(task_id)
+
+    def slack(self, task_id: str) -> float:
+        return self.latest_start[task_id] - self.earliest_start[task_id]
+
+    def critical_path(self) -> List[str]:
+        """Chain of zero-slack tasks from project start to the latest finish"""
+        path = []
+        current = next(
+            (t for t in self.order
+             if not self.tasks[t].depends_on and self.slack(t) <= EPSILON),
+            None
+        )
+        while current is not None:
+            path.append(current)
+            finish = self.earliest_start[current] + self.tasks[current].duration
+            current = next(
+                (s for s in self.successors[current]
+                 if self.slack(s) <= EPSILON and abs(self.earliest_start[s] - finish) <= EPSILON),
+                None
+            )
+        return path
+
+    def update_duration(self, task_id: str, duration: float) -> List[str]:
+        """Change one task's duration and repropagate only the affected tasks"""
+        was_critical = self.slack(task_id) <= EPSILON
+        shrinking = float(duration) < self.tasks[task_id].duration
+        self.tasks[task_id].duration = float(duration)
+        self._levelled = None
+
+        # Forward: walk descendants in topological order while start times move
+        changed = []
+        heap = [(self.position[task_id], task_id)]
+        queued = {task_id}
+        while heap:
+            _, current = heapq.heappop(heap)
+            if current != task_id:
+                new_start = self._earliest_for(current)
+                if abs(new_start - self.earliest_start[current]) <= EPSILON:
+                    continue
+                self.earliest_start[current] = new_start
+            changed.append(current)
+            for succ in self.successors[current]:
+                if succ not in queued:
+                    queued.add(succ)
+                    heapq.heappush(heap, (self.position[succ], succ))
+
+        old_makespan = self.makespan
+        if was_critical and shrinking:
+            self.makespan = max(
+                self.earliest_start[t] + task.duration for t, task in self.tasks.items()
+            )
+        else:
+            self.makespan = max(
+                self.makespan,
+                max(self.earliest_start[t] + self.tasks[t].duration for t in changed)
+            )
+        if abs(self.makespan - old_makespan) > EPSILON:
+            # Project end moved: every latest start shifts
+            self._compute_backward(self.order)
+            return changed
+
+        # Backward: walk ancestors in reverse topological order while latest starts move
+        heap = [(-self.position[task_id], task_id)]
+        queued = {task_id}
+        while heap:
+            _, current = heapq.heappop(heap)
+            new_latest = self._latest_for(current)
+            if current != task_id and abs(new_latest - self.latest_start[current]) <= EPSILON:
+                continue
+            self.latest_start[current] = new_latest
+            for dep in self.tasks[current].depends_on:
+                if dep not in queued:
+                    queued.add(dep)
+                    heapq.heappush(heap, (-self.position[dep], dep))
+        return changed
+
+    def levelled_schedule(self) -> Dict[str, float]:
+        """Resource-feasible start times from heap-based parallel list scheduling"""
+        if self._levelled is not None:
+            return self._levelled
+
+        remaining_deps = {task_id: len(task.depends_on) for task_id, task in self.tasks.items()}
+        available = dict(self.capacities)
+        starts: Dict[str, float] = {}
+
+        # Ready tasks are grouped by identical resource demand so a group that
+        # does not fit is skipped as a whole; within and across groups the task
+        # with the earliest latest start (least slack) goes first.
+        groups: Dict[tuple, List[tuple]] = defaultdict(list)
+
+        def make_ready(task_id: str) -> None:
+            signature = tuple(sorted(self.tasks[task_id].resources.items()))
+            heapq.heappush(groups[signature], (self.latest_start[task_id], self.position[task_id], task_id))
+
+        for task_id, degree in remaining_deps.items():
+            if degree == 0:
+                make_ready(task_id)
+
+        running: List[tuple] = []
+        now = 0.0
+
+        while groups or running:
+            heads = [(group[0], signature) for signature, group in groups.items()]
+            heapq.heapify(heads)
+            while heads:
+                _, signature = heapq.heappop(heads)
+                if any(available[r] < amount for r, amount in signature):
+                    continue
+                for resource, amount in signature:
+                    available[resource] -= amount
+                group = groups[signature]
+                _, _, task_id = heapq.heappop(group)
+                starts[task_id] = now
+                heapq.heappush(running, (now + self.tasks[task_id].duration, self.position[task_id], task_id))
+                if group:
+                    heapq.heappush(heads, (group[0], signature))
+                else:
+                    del groups[signature]
+
+            if not running:
+                break
+
+            # Advance to the next completion and release everything finishing then
+            now = running[0][0]
+            while running and running[0][0] <= now + EPSILON:
+                _, _, finished_id = heapq.heappop(running)
+                for resource, amount in self.tasks[finished_id].resources.items():
+                    available[resource] += amount
+                for succ in self.successors[finished_id]:
+                    remaining_deps[succ] -= 1
+                    if remaining_deps[succ] == 0:
+                        make_ready(succ)
+
+        self._levelled = starts
+        return starts
+
+    def summary(self) -> Dict[str, Any]:
+        """Timeline in the phases/milestones shape returned by timeline_planner"""
+        starts = self.levelled_schedule()
+        finishes = {t: starts[t] + task.duration for t, task in self.tasks.items()}
+        total_duration = max(finishes.values(), default=0.0)
+
+        phases: Dict[str, Dict[str, Any]] = {}
+        for task_id in sorted(self.tasks, key=lambda t: (starts[t], self.position[t])):
+            task = self.tasks[task_id]
+            phase = phases.setdefault(task.phase or "Execution", {
+                "name": task.phase or "Execution",
+                "start": starts[task_id],
+                "end": finishes[task_id],
+                "tasks": []
+            })
+            phase["start"] = min(phase["start"], starts[task_id])
+            phase["end"] = max(phase["end"], finishes[task_id])
+            phase["tasks"].append(task.name or task_id)
+        for phase in phases.values():
+            phase["duration"] = phase["end"] - phase["start"]
+
+        milestones = sorted(
+            ({"day": finishes[t], "description": task.milestone}
+             for t, task in self.tasks.items() if task.milestone),
+            key=lambda milestone: milestone["day"]
+        )
+
+        return {
+            "total_duration": total_duration,
+            "unconstrained_duration": self.makespan,
+            "phases": sorted(phases.values(), key=lambda phase: phase["start"]),
+            "milestones": milestones,
+            "critical_path": [self.tasks[t].name or t for t in self.critical_path()],
+            "tasks": [
+                {
+                    "id": t,
+                    "start": starts[t],
+                    "finish": finishes[t],
+                    "earliest_start": self.earliest_start[t],
+                    "slack": self.slack(t),
+                    "delay": starts[t] - self.earliest_start[t]
+                }
+                for t in self.order
+            ]
+        }
+
+
+DEFAULT_TASKS = [
+    {"id": "protocol", "name": "Protocol development", "duration": 3, "phase": "Planning"},
+    {"id": "resources", "name": "Resource allocation", "duration": 2, "phase": "Planning",
+     "depends_on": ["protocol"], "milestone": "Protocol approval"},
+    {"id": "collection", "name": "Data collection", "duration": 15, "phase": "Execution",
+     "depends_on": ["resources"]},
+    {"id": "analysis", "name": "Analysis", "duration": 5, "phase": "Execution",
+     "depends_on": ["collection"], "milestone": "Data collection complete"},
+    {"id": "report", "name": "Report writing", "duration": 3, "phase": "Reporting",
+     "depends_on": ["analysis"]},
+    {"id": "documentation", "name": "Documentation", "duration": 2, "phase": "Reporting",
+     "depends_on": ["report"], "milestone": "Final report due"}
+]
@@ -0,0 +1,278 @@
+"""
+LabGuard Pro Tool Process Pool
+Managed process pool for CPU-bound Biomni tools with pre-warmed workers,
+per-worker task-count and RSS based recycling and transparent crash recovery
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from agent_logging import RequestScope, request_id_var
+
+logger = logging.getLogger(__name__)
+
+_worker_agent = None
+# Shared with the parent: sequence number of the task this worker last started
+_started_task = None
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        # No RSS source (Windows): never recycle on memory; max_tasks_per_child still applies
+        return 0.0
+    # Peak RSS is the best portable fallback (KiB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if peak > 1 << 30 else peak / 1024
+
+
+def _init_worker(started_task: Any = None, profile_dir: Optional[str] = None,
+                 profile_rate: float = 1.0) -> None:
+    """Import OpenCV and build the agent once per worker instead of once per task"""
+    global _worker_agent, _started_task
+    _started_task = started_task
+    import cv2
+    cv2.setNumThreads(1)
+    from agent_logging import configure_logging
+    from biomni_agent import BiomniAgent
+    from tool_profiler import ToolProfiler
+    configure_logging()
+    profiler = ToolProfiler(profile_dir, sample_rate=profile_rate) if profile_dir else None
+    _worker_agent = BiomniAgent(profiler=profiler)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _run_tool(tool: str, query: str, databases: List[str],
+              parameters: Optional[Dict[str, Any]], request_id: Optional[str] = None,
+              sequence: int = 0) -> tuple:
+    if _started_task is not None:
+        _started_task.value = sequence
+    parameters = dict(parameters or {})
+    source = parameters.pop("image_source", None)
+    if source is not None:
+        from image_input import decode_image
+        parameters["image"] = decode_image(source)
+    # Same path as in-process calls, so the worker's profiler sees pooled tools too
+    profiler = _worker_agent.profiler
+    profiled_before = profiler.profiled_calls if profiler is not None else 0
+    with RequestScope(request_id or 'norequest'):
+        result = _worker_agent.call_tool(tool, query, databases, parameters or None)
+    profiled = profiler is not None and profiler.profiled_calls > profiled_before
+    return result, os.getpid(), _current_rss_mb(), profiled
+
+
+@dataclass
+class PoolConfig:
+    workers: int = 0
+    max_tasks_per_child: int = 50
+    max_rss_mb: float = 1024.0
+    retries: int = 1
+    profile_dir: Optional[str] = None
+    profile_rate: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> 'PoolConfig':
+        return cls(
+            workers=int(os.getenv('BIOMNI_POOL_WORKERS', '0')),
+            max_tasks_per_child=int(os.getenv('BIOMNI_POOL_MAX_TASKS', '50')),
+            max_rss_mb=float(os.getenv('BIOMNI_POOL_MAX_RSS_MB', '1024'))
+        )
+
+
+class _PoolFuture(Future):
+    """Caller-side future; cancel() fails once a worker has started the task"""
+
+    def __init__(self):
+        super().__init__()
+        self.inner: Optional[Future] = None
+        self.slot: Optional['_WorkerSlot'] = None
+        self.sequence = 0
+
+    def cancel(self) -> bool:
+        if self.slot is not None and self.slot.started_task.value >= self.sequence:
+            return False
+        if not super().cancel():
+            return False
+        if self.inner is not None:
+            # Best effort: a task already handed to the worker's call queue still runs,
+            # but its result is discarded
+            self.inner.cancel()
+        return True
+
+
+@dataclass
+class _WorkerSlot:
+    """One worker process behind its own single-worker executor"""
+    executor: ProcessPoolExecutor
+    started_task: Any
+    next_sequence: int = 0
+    # Caller futures in submission order; the single worker runs them front to back
+    queue: deque = field(default_factory=deque)
+    ready: bool = False
+
+
+class ToolProcessPool:
+    """Worker processes that are replaced one at a time when they crash or outgrow their RSS cap"""
+
+    def __init__(self, config: PoolConfig):
+        if config.workers < 1:
+            raise ValueError("Tool process pool needs at least one worker")
+        self.config = config
+        self._lock = threading.RLock()
+        self._slots: List[Optional[_WorkerSlot]] = [None] * config.workers
+        self.generation = 0
+        self.recycled_for_rss = 0
+        self.restarted_after_crash = 0
+        self.profiled_calls = 0
+        self._closed = False
+
+    def _new_slot(self) -> _WorkerSlot:
+        # One executor per worker, so recycling one worker never disturbs the others;
+        # max_tasks_per_child still replaces the process inside its executor
+        context = multiprocessing.get_context('spawn')
+        started_task = context.RawValue('q', 0)
+        executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(started_task, self.config.profile_dir, self.config.profile_rate),
+            max_tasks_per_child=self.config.max_tasks_per_child
+        )
+        # Spawn the worker now so the first real task doesn't pay for imports
+        slot = _WorkerSlot(executor, started_task)
+        executor.submit(_warm_up).add_done_callback(lambda _: self._advance(slot, warmed=True))
+        self.generation += 1
+        return slot
+
+    def _slot_for_submit(self, outer: Future) -> tuple:
+        """Queue outer on the least-busy worker slot, started on first use"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Tool process pool is shut down")
+            for index, slot in enumerate(self._slots):
+                if slot is None:
+                    self._slots[index] = self._new_slot()
+            index = min(range(len(self._slots)), key=lambda i: len(self._slots[i].queue))
+            slot = self._slots[index]
+            slot.next_sequence += 1
+            outer.slot, outer.sequence = slot, slot.next_sequence
+            slot.queue.append(outer)
+            self._advance(slot)
+            return index, slot
+
+    def _advance(self, slot: _WorkerSlot, finished: Optional[Future] = None, warmed: bool = False) -> None:
+        """Mark the task at the front of a warmed-up worker's queue as running"""
+        with self._lock:
+            if finished is not None:
+                slot.queue.remove(finished)
+            slot.ready = slot.ready or warmed
+            # A retried task is already running; a cancelled one is done
+            if slot.ready and slot.queue and not slot.queue[0].running() and not slot.queue[0].done():
+                slot.queue[0].set_running_or_notify_cancel()
+
+    def _retire(self, index: int, slot: _WorkerSlot) -> bool:
+        """Replace one worker; tasks already queued on it still complete"""
+        with self._lock:
+            if self._closed or self._slots[index] is not slot:
+                return False
+            self._slots[index] = self._new_slot()
+        slot.executor.shutdown(wait=False)
+        return True
+
+    def start(self) -> None:
+        """Spawn and warm up every worker ahead of the first task"""
+        with self._lock:
+            for index, slot in enumerate(self._slots):
+                if slot is None:
+                    self._slots[index] = self._new_slot()
+
+    def submit(self, tool: str, query: str, databases: List[str],
+               parameters: Optional[Dict[str, Any]] = None) -> Future:
+        """Run a tool in a worker; the returned future yields the tool's result dict"""
+        outer = _PoolFuture()
+        args = (tool, query, databases, parameters, request_id_var.get())
+        self._dispatch(outer, args, self.config.retries)
+        return outer
+
+    def _dispatch(self, outer: Future, args: tuple, retries: int) -> None:
+        index, slot = self._slot_for_submit(outer)
+        try:
+            inner = slot.executor.submit(_run_tool, *args, outer.sequence)
+        except BrokenProcessPool:
+            inner = None
+        outer.inner = inner
+
+        def done(future: Optional[Future]) -> None:
+            self._advance(slot, finished=outer)
+            if outer.cancelled():
+                return
+            try:
+                if future is None:
+                    raise BrokenProcessPool("Tool worker is not accepting work")
+                result, pid, rss_mb, profiled = future.result()
+            except BrokenProcessPool as e:
+                if self._retire(index, slot):
+                    self.restarted_after_crash += 1
+                if retries > 0 and not self._closed:
+                    logger.warning("Tool worker crashed, retrying", extra={"tool": args[0]})
+                    self._dispatch(outer, args, retries - 1)
+                else:
+                    outer.set_exception(RuntimeError(f"Tool worker crashed: {e}"))
+                return
+            except BaseException as e:
+                outer.set_exception(e)
+                return
+            if rss_mb > self.config.max_rss_mb and self._retire(index, slot):
+                logger.info("Recycled tool worker", extra={"worker_pid": pid, "rss_mb": round(rss_mb, 1)})
+                self.recycled_for_rss += 1
+            if profiled:
+                self.profiled_calls += 1
+            outer.set_result(result)
+
+        if inner is None:
+            done(None)
+        else:
+            inner.add_done_callback(done)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers; without wait, queued tasks are dropped and busy workers killed"""
+        with self._lock:
+            self._closed = True
+            slots, self._slots = self._slots, [None] * self.config.workers
+        for slot in slots:
+            if slot is None:
+                continue
+            if wait:
+                slot.executor.shutdown(wait=True)
+                continue
+            # An abandoned task would otherwise keep the interpreter alive at exit
+            # (concurrent.futures joins its workers); there is no public terminate
+            busy = list((slot.executor._processes or {}).values()) if slot.queue else []
+            slot.executor.shutdown(wait=False, cancel_futures=True)
+            for process in busy:
+                process.terminate()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.config.workers,
+            "generation": self.generation,
+            "recycled_for_rss": self.recycled_for_rss,
+            "restarted_after_crash": self.restarted_after_crash,
+            "profiled_calls": self.profiled_calls
+        }
@@ -0,0 +1,92 @@
+"""
+LabGuard Pro Tool Profiler
+Per-tool cProfile and tracemalloc reports for Biomni tool calls, with a
+sampling rate low enough to leave enabled in production
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Optional
+
+from agent_logging import request_id_var
+
+
+class ToolProfiler:
+    """Wrap tool calls and write CPU and allocation reports for sampled calls"""
+
+    def __init__(self, output_dir: str, sample_rate: float = 1.0, top_n: int = 25,
+                 trace_memory: bool = True, traceback_depth: int = 1):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self.traceback_depth = traceback_depth
+        self.profiled_calls = 0
+        # tracemalloc is process-wide, so only one sampled call traces memory at a time
+        self._memory_lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def call(self, tool: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return fn(*args)
+
+        tracing = self.trace_memory and self._memory_lock.acquire(blocking=False)
+        try:
+            if tracing:
+                tracemalloc.start(self.traceback_depth)
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                return fn(*args)
+            finally:
+                profile.disable()
+                elapsed = time.perf_counter() - started
+                snapshot = tracemalloc.take_snapshot() if tracing else None
+                peak = tracemalloc.get_traced_memory()[1] if tracing else None
+                if tracing:
+                    tracemalloc.stop()
+                self._write_report(tool, profile, elapsed, snapshot, peak)
+        finally:
+            if tracing:
+                self._memory_lock.release()
+
+    def _write_report(self, tool: str, profile: cProfile.Profile, elapsed: float,
+                      snapshot: Optional[tracemalloc.Snapshot], peak: Optional[int]) -> None:
+        self.profiled_calls += 1
+        request_id = request_id_var.get() or 'norequest'
+        stem = os.path.join(self.output_dir, f"{int(time.time() * 1000)}_{request_id}_{tool}")
+
+        profile.dump_stats(stem + '.prof')
+
+        buffer = io.StringIO()
+        buffer.write(f"tool: {tool}\nrequest_id: {request_id}\nwall_time_ms: {elapsed * 1000:.3f}\n")
+        if peak is not None:
+            buffer.write(f"peak_traced_kib: {peak / 1024:.1f}\n")
+        buffer.write(f"\n== Top {self.top_n} functions by cumulative time ==\n")
+        pstats.Stats(profile, stream=buffer).sort_stats('cumulative').print_stats(self.top_n)
+
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__)
+            ])
+            buffer.write(f"\n== Top {self.top_n} allocation sites ==\n")
+            for stat in snapshot.statistics('lineno')[:self.top_n]:
+                buffer.write(f"{stat}\n")
+
+        with open(stem + '.txt', 'w') as handle:
+            handle.write(buffer.getvalue())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "output_dir": self.output_dir,
+            "sample_rate": self.sample_rate,
+            "profiled_calls": self.profiled_calls
+        }
@@ -0,0 +1,211 @@
+"""
+LabGuard Pro Tool Router
+Hashed n-gram TF-IDF index over Biomni tool descriptions and past queries,
+used to prune a broad tool list down to the tools a query actually needs
+"""
+
+import json
+import re
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Feature space size; collisions are rare at this size for short lab queries
+HASH_DIMENSIONS = 1 << 15
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# What each tool is for, in the vocabulary lab staff actually use
+TOOL_DESCRIPTIONS = {
+    'protocol_generator': "generate write design experimental protocol procedure sop steps method workflow "
+                          "sample preparation reagents materials instructions",
+    'research_assistant': "research literature review papers publications pubmed background hypothesis "
+                          "study references citations summarize findings",
+    'data_analyzer': "analyze data dataset statistics statistical analysis trends correlation significance "
+                     "results spreadsheet measurements outliers",
+    'equipment_optimizer': "optimize equipment instrument settings performance efficiency utilization "
+                           "throughput configuration usage scheduling",
+    'safety_checker': "safety hazard ppe biosafety chemical spill fume hood msds sds exposure incident "
+                      "protective gloves waste disposal",
+    'compliance_validator': "compliance regulatory regulation audit accreditation cap clia iso gmp glp fda "
+                            "documentation inspection certification",
+    'cost_calculator': "cost price budget expense spend money dollars quote purchase reagents consumables "
+                       "equipment pricing estimate",
+    'timeline_planner': "timeline schedule plan project milestones deadline weeks days phases duration "
+                        "gantt critical path",
+    'risk_assessor': "risk assessment failure probability likelihood impact mitigation contingency "
+                     "uncertainty threat",
+    'quality_controller': "quality control qc westgard levey jennings control limits controls run "
+                          "calibration verification shift trend sd",
+    'visual_analyzer': "image photo picture visual analyze look appearance color colour brightness",
+    'sample_quality_assessor': "sample quality integrity degradation hemolysis purity specimen viability "
+                               "storage condition",
+    'culture_growth_analyzer': "culture growth curve colony colonies bacterial plate incubation doubling od600 "
+                               "proliferation",
+    'contamination_detector': "contamination contaminated contaminant mycoplasma mold fungal bacterial "
+                              "sterile sterility cross",
+    'equipment_condition_monitor': "equipment condition maintenance wear malfunction broken repair "
+                                   "centrifuge incubator freezer alarm service",
+    'microscopy_interpreter': "microscopy microscope slide cells cell count morphology staining stained "
+                              "field magnification objective",
+    'pcr_optimizer': "pcr qpcr primer primers annealing temperature tm melting amplification cycles "
+                     "magnesium thermocycler amplicon",
+    'sequencing_analyzer': "sequencing sequence reads ngs illumina coverage alignment variant fastq "
+                           "genome dna rna quality score",
+    'flow_cytometry_processor': "flow cytometry facs gating gate fluorescence markers populations events "
+                                "compensation antibody cd4 cd8",
+    'cell_culture_monitor': "cell culture passage confluence confluency media medium flask viability "
+                            "mammalian cells split feeding"
+}
+
+
+# Character trigrams catch inflections ("contaminated" vs "contamination") but are
+# noisy on their own, so they count for less than whole words
+CHAR_GRAM_WEIGHT = 0.25
+
+
+def _features(text: str) -> Dict[int, float]:
+    """Word unigrams, word bigrams and in-word character trigrams, hashed"""
+    words = WORD_PATTERN.findall(text.lower())
+    features: Dict[int, float] = {}
+
+    def add(gram: str, weight: float) -> None:
+        # crc32 is stable across processes, unlike the salted built-in hash()
+        key = zlib.crc32(gram.encode()) % HASH_DIMENSIONS
+        features[key] = features.get(key, 0.0) + weight
+
+    for word in words:
+        add(word, 1.0)
+        padded = f"<{word}>"
+        for i in range(len(padded) - 2):
+            add(f"#{padded[i:i + 3]}", CHAR_GRAM_WEIGHT)
+    for first, second in zip(words, words[1:]):
+        add(f"{first} {second}", 1.0)
+    return features
+
+
+@dataclass
+class RoutingDecision:
+    selected: List[str]
+    pruned: List[str]
+    scores: Dict[str, float]
+    confident: bool
+    duration_ms: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": "auto",
+            "selected": self.selected,
+            "pruned": self.pruned,
+            "scores": self.scores,
+            "confident": self.confident,
+            "duration_ms": self.duration_ms
+        }
+
+
+class ToolRouter:
+    """Score tools against a query by cosine similarity of TF-IDF vectors"""
+
+    def __init__(self, descriptions: Optional[Dict[str, str]] = None,
+                 examples: Optional[Sequence[Dict[str, Any]]] = None,
+                 example_weight: float = 1.0, min_score: float = 0.06,
+                 relative_score: float = 0.5):
+        descriptions = descriptions or TOOL_DESCRIPTIONS
+        examples = [e for e in (examples or []) if e.get("tools")]
+        self.tools = list(descriptions)
+        self.min_score = min_score
+        self.relative_score = relative_score
+        tool_rows = {tool: i for i, tool in enumerate(self.tools)}
+
+        documents = [_features(descriptions[tool]) for tool in self.tools]
+        example_docs = [_features(example["query"]) for example in examples]
+
+        # Smoothed IDF over every document the index has seen
+        document_frequency = np.zeros(HASH_DIMENSIONS, dtype=np.float32)
+        for doc in documents + example_docs:
+            document_frequency[list(doc)] += 1
+        total = len(documents) + len(example_docs)
+        self.idf = (np.log((1 + total) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        profiles = np.zeros((len(self.tools), HASH_DIMENSIONS), dtype=np.float32)
+        for row, doc in enumerate(documents):
+            self._accumulate(profiles[row], doc, 1.0)
+        # Past queries pull a tool's profile towards how people actually ask for it
+        example_counts = Counter()
+        for example in examples:
+            example_counts.update(tool for tool in example["tools"] if tool in tool_rows)
+        for example, doc in zip(examples, example_docs):
+            for tool in example["tools"]:
+                if tool in tool_rows:
+                    self._accumulate(profiles[tool_rows[tool]], doc, example_weight / example_counts[tool])
+        norms = np.linalg.norm(profiles, axis=1, keepdims=True)
+        profiles /= np.maximum(norms, 1e-12)
+        # Feature-major layout so a query only touches the rows for its own features
+        self.index = np.ascontiguousarray(profiles.T)
+
+    def _vectorize(self, features: Dict[int, float]) -> tuple:
+        indices = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+        weights = np.log1p(np.fromiter(features.values(), dtype=np.float32, count=len(features)))
+        weights *= self.idf[indices]
+        return indices, weights / max(float(np.linalg.norm(weights)), 1e-12)
+
+    def _accumulate(self, row: np.ndarray, features: Dict[int, float], weight: float) -> None:
+        indices, weights = self._vectorize(features)
+        row[indices] += weight * weights
+
+    @classmethod
+    def from_examples_file(cls, path: str, **kwargs: Any) -> 'ToolRouter':
+        """Build from a JSON list or JSONL file of {"query": ..., "tools": [...]}"""
+        with open(path) as handle:
+            text = handle.read()
+        stripped = text.lstrip()
+        if stripped.startswith('['):
+            examples = json.loads(stripped)
+        else:
+            examples = [json.loads(line) for line in text.splitlines() if line.strip()]
+        return cls(examples=examples, **kwargs)
+
+    def score(self, query: str) -> Dict[str, float]:
+        features = _features(query)
+        if not features:
+            return {tool: 0.0 for tool in self.tools}
+        indices, weights = self._vectorize(features)
+        scores = weights @ self.index[indices]
+        return {tool: float(value) for tool, value in zip(self.tools, scores)}
+
+    def route(self, query: str, candidates: Iterable[str], pinned: Iterable[str] = (),
+              max_tools: Optional[int] = None) -> RoutingDecision:
+        """Keep candidates scoring near the best match; pinned tools always run"""
+        started = time.perf_counter()
+        candidates = list(candidates)
+        pinned = set(pinned)
+        scores = self.score(query)
+        ranked = sorted(candidates, key=lambda tool: -scores.get(tool, 0.0))
+        best = scores.get(ranked[0], 0.0) if ranked else 0.0
+        cutoff = max(self.min_score, self.relative_score * best)
+
+        selected = [tool for tool in ranked if scores.get(tool, 0.0) >= cutoff]
+        confident = bool(selected)
+        if not confident:
+            # Nothing matched well; pruning blind could drop the answer, so run everything
+            # the caller's cap allows
+            selected = ranked
+        if max_tools is not None:
+            selected = selected[:max_tools]
+        selected += [tool for tool in ranked if tool in pinned and tool not in selected]
+        # Preserve the caller's ordering for execution and output
+        keep = set(selected)
+        selected = [tool for tool in candidates if tool in keep]
+        pruned = [tool for tool in candidates if tool not in keep]
+
+        return RoutingDecision(
+            selected=selected,
+            pruned=pruned,
+            scores={tool: round(scores.get(tool, 0.0), 4) for tool in ranked},
+            confident=confident,
+            duration_ms=round((time.perf_counter() - started) * 1000, 3)
+        )
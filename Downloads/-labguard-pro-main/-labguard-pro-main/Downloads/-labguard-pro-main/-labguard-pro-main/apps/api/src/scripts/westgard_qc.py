@@ -0,0 +1,244 @@
+"""
+LabGuard Pro Westgard QC
+Incremental and vectorized Westgard multi-rule evaluation of
+Levey-Jennings control series, used by the Biomni quality_controller tool
+"""
+
+import json
+import os
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+WARNING_RULES = ['1-2s']
+REJECTION_RULES = ['1-3s', '2-2s', 'R-4s', '4-1s', '10x']
+BASELINE_POINTS = 20
+MAX_VIOLATIONS_KEPT = 100
+
+
+@dataclass
+class AnalyteState:
+    """Running per-analyte QC state; every update is O(1)"""
+    analyte: str
+    mean: float
+    sd: float
+    count: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+    prev_z: Optional[float] = None
+    run_above_mean: int = 0
+    run_below_mean: int = 0
+    run_above_1s: int = 0
+    run_below_1s: int = 0
+    run_above_2s: int = 0
+    run_below_2s: int = 0
+    rule_counts: Dict[str, int] = field(default_factory=lambda: {r: 0 for r in WARNING_RULES + REJECTION_RULES})
+    rejected_points: int = 0
+    violations: deque = field(default_factory=lambda: deque(maxlen=MAX_VIOLATIONS_KEPT))
+
+    def update(self, value: float) -> List[str]:
+        """Add one control measurement and return the rules it triggers"""
+        z = (value - self.mean) / self.sd
+        self.run_above_mean = self.run_above_mean + 1 if z > 0 else 0
+        self.run_below_mean = self.run_below_mean + 1 if z < 0 else 0
+        self.run_above_1s = self.run_above_1s + 1 if z > 1 else 0
+        self.run_below_1s = self.run_below_1s + 1 if z < -1 else 0
+        self.run_above_2s = self.run_above_2s + 1 if z > 2 else 0
+        self.run_below_2s = self.run_below_2s + 1 if z < -2 else 0
+
+        triggered = []
+        if abs(z) > 2:
+            triggered.append('1-2s')
+        if abs(z) > 3:
+            triggered.append('1-3s')
+        if self.run_above_2s >= 2 or self.run_below_2s >= 2:
+            triggered.append('2-2s')
+        if self.prev_z is not None and ((z > 2 and self.prev_z < -2) or (z < -2 and self.prev_z > 2)):
+            triggered.append('R-4s')
+        if self.run_above_1s >= 4 or self.run_below_1s >= 4:
+            triggered.append('4-1s')
+        if self.run_above_mean >= 10 or self.run_below_mean >= 10:
+            triggered.append('10x')
+
+        self._record(self.count, value, triggered)
+        self.prev_z = z
+        return triggered
+
+    def backfill(self, values: Sequence[float]) -> np.ndarray:
+        """Evaluate a historical series in one vectorized pass, continuing the running state"""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return np.zeros((0, len(WARNING_RULES + REJECTION_RULES)), dtype=bool)
+        z = (values - self.mean) / self.sd
+        prev = np.empty_like(z)
+        prev[0] = np.nan if self.prev_z is None else self.prev_z
+        prev[1:] = z[:-1]
+
+        runs = {
+            'above_mean': _run_lengths(z > 0, self.run_above_mean),
+            'below_mean': _run_lengths(z < 0, self.run_below_mean),
+            'above_1s': _run_lengths(z > 1, self.run_above_1s),
+            'below_1s': _run_lengths(z < -1, self.run_below_1s),
+            'above_2s': _run_lengths(z > 2, self.run_above_2s),
+            'below_2s': _run_lengths(z < -2, self.run_below_2s),
+        }
+
+        with np.errstate(invalid='ignore'):
+            flags = np.column_stack([
+                np.abs(z) > 2,
+                np.abs(z) > 3,
+                (runs['above_2s'] >= 2) | (runs['below_2s'] >= 2),
+                ((z > 2) & (prev < -2)) | ((z < -2) & (prev > 2)),
+                (runs['above_1s'] >= 4) | (runs['below_1s'] >= 4),
+                (runs['above_mean'] >= 10) | (runs['below_mean'] >= 10),
+            ])
+
+        rules = WARNING_RULES + REJECTION_RULES
+        for row in np.flatnonzero(flags.any(axis=1)):
+            self._record(int(self.count + row), float(values[row]), [rules[c] for c in np.flatnonzero(flags[row])],
+                         advance=False)
+
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.total_sq += float(np.square(values).sum())
+        self.prev_z = float(z[-1])
+        self.run_above_mean = int(runs['above_mean'][-1])
+        self.run_below_mean = int(runs['below_mean'][-1])
+        self.run_above_1s = int(runs['above_1s'][-1])
+        self.run_below_1s = int(runs['below_1s'][-1])
+        self.run_above_2s = int(runs['above_2s'][-1])
+        self.run_below_2s = int(runs['below_2s'][-1])
+        return flags
+
+    def _record(self, index: int, value: float, triggered: List[str], advance: bool = True) -> None:
+        if advance:
+            self.count += 1
+            self.total += value
+            self.total_sq += value * value
+        for rule in triggered:
+            self.rule_counts[rule] += 1
+        if any(rule in REJECTION_RULES for rule in triggered):
+            self.rejected_points += 1
+        if triggered:
+            self.violations.append({"index": index, "value": float(value), "rules": triggered})
+
+    @property
+    def observed_mean(self) -> float:
+        return self.total / self.count if self.count else self.mean
+
+    @property
+    def observed_sd(self) -> float:
+        if self.count < 2:
+            return self.sd
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return float(np.sqrt(max(variance, 0.0)))
+
+    def status(self) -> str:
+        if not self.violations:
+            return "IN_CONTROL"
+        last = self.violations[-1]
+        if last["index"] != self.count - 1:
+            return "IN_CONTROL"
+        return "REJECT" if any(r in REJECTION_RULES for r in last["rules"]) else "WARNING"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "analyte": self.analyte,
+            "status": self.status(),
+            "points": self.count,
+            "target_mean": self.mean,
+            "target_sd": self.sd,
+            "observed_mean": round(self.observed_mean, 4),
+            "observed_sd": round(self.observed_sd, 4),
+            "rule_counts": dict(self.rule_counts),
+            "rejected_points": self.rejected_points,
+            "recent_violations": list(self.violations)[-10:]
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data["violations"] = list(self.violations)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AnalyteState':
+        return cls(**{**data, "violations": deque(data.get("violations", []), maxlen=MAX_VIOLATIONS_KEPT)})
+
+
+def _run_lengths(condition: np.ndarray, carried: int) -> np.ndarray:
+    """Length of the run of True values ending at each position"""
+    index = np.arange(len(condition))
+    last_false = np.maximum.accumulate(np.where(condition, -1, index))
+    runs = index - last_false
+    # Positions before the first False continue the run carried in from earlier data
+    return np.where(last_false < 0, runs + carried, runs)
+
+
+class WestgardMonitor:
+    """Collection of per-analyte Levey-Jennings states"""
+
+    def __init__(self):
+        self.analytes: Dict[str, AnalyteState] = {}
+
+    def configure(self, analyte: str, mean: float, sd: float) -> AnalyteState:
+        if sd <= 0:
+            raise ValueError(f"Control SD must be positive for analyte {analyte}")
+        state = self.analytes.get(analyte)
+        if state is None:
+            state = self.analytes[analyte] = AnalyteState(analyte=analyte, mean=float(mean), sd=float(sd))
+        else:
+            state.mean, state.sd = float(mean), float(sd)
+        return state
+
+    def ingest(self, analyte: str, value: float) -> List[str]:
+        return self.analytes[analyte].update(float(value))
+
+    def backfill(self, analyte: str, values: Sequence[float],
+                 mean: Optional[float] = None, sd: Optional[float] = None) -> np.ndarray:
+        """Load a historical series, establishing limits from its baseline if none exist"""
+        if analyte not in self.analytes or mean is not None:
+            if mean is None or sd is None:
+                baseline = np.asarray(values[:BASELINE_POINTS], dtype=np.float64)
+                if len(baseline) < 2:
+                    raise ValueError(f"Need control limits or at least two baseline points for {analyte}")
+                mean = float(baseline.mean()) if mean is None else mean
+                sd = float(baseline.std(ddof=1)) if sd is None else sd
+            self.configure(analyte, mean, sd)
+        return self.analytes[analyte].backfill(values)
+
+    def save(self, path: str) -> None:
+        """Write every analyte's running state as JSON, replacing the file atomically"""
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w') as handle:
+            json.dump({name: state.to_dict() for name, state in self.analytes.items()}, handle)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'WestgardMonitor':
+        """Restore a monitor saved with save(); a missing file gives an empty monitor"""
+        monitor = cls()
+        if os.path.exists(path):
+            with open(path) as handle:
+                monitor.analytes = {name: AnalyteState.from_dict(data) for name, data in json.load(handle).items()}
+        return monitor
+
+
+@contextmanager
+def persistent_monitor(path: str) -> Iterator[WestgardMonitor]:
+    """Load a saved monitor under an exclusive file lock and save it back on success"""
+    with open(f"{path}.lock", 'a') as lock:
+        # fcntl is Unix-only; the agent also runs on Windows, where msvcrt locks a byte range
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        monitor = WestgardMonitor.load(path)
+        yield monitor
+        monitor.save(path)
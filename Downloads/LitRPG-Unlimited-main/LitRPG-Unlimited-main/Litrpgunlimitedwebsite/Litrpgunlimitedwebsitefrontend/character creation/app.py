@@ -1,12 +1,15 @@
 import pygame
-import random
+
+from battle_physics import EnemySwarm
+from battle_rules import (ARENA_HEIGHT, ARENA_WIDTH, PLAYER_SPEED, PLAYER_START, WEAPONS, apply_quiz_results,
+                          apply_weapon, final_wave, reset_stats, resolve_contacts, tutorial_wave)
 
 # Initialize Pygame
 pygame.init()
 
 # Screen dimensions
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
+SCREEN_WIDTH = ARENA_WIDTH
+SCREEN_HEIGHT = ARENA_HEIGHT
 
 # Colors
 WHITE = (255, 255, 255)
@@ -23,6 +26,16 @@ pygame.display.set_caption("Kingdom Hearts: Dive to the Heart")
 clock = pygame.time.Clock()
 FPS = 60
 
+# Fonts for the in-window quiz and weapon menus
+TITLE_FONT = pygame.font.Font(None, 40)
+OPTION_FONT = pygame.font.Font(None, 32)
+HUD_FONT = pygame.font.Font(None, 28)
+
+# Battles simulate in fixed steps independent of the render rate; a slow
+# frame runs extra steps (up to a cap) instead of stretching movement
+SIM_DT = 1.0 / 60
+MAX_FRAME_TIME = 0.25
+
 # Game states
 PERSONALITY_QUIZ = 1
 WEAPON_SELECTION = 2
@@ -30,174 +43,272 @@ TUTORIAL_BATTLE = 3
 FINAL_BATTLE = 4
 game_state = PERSONALITY_QUIZ
 
-# Character class
-class Character(pygame.sprite.Sprite):
+# Character class; dirty sprites are only redrawn when they move
+class Character(pygame.sprite.DirtySprite):
     def __init__(self, x, y):
         super().__init__()
         self.image = pygame.Surface((50, 50))
         self.image.fill(GREEN)
         self.rect = self.image.get_rect()
+        self.reset(x, y)
+
+    def reset(self, x, y):
         self.rect.center = (x, y)
-        self.health = 100
-        self.attack_power = 10
-        self.defense = 5
+        self.dirty = 1
+        reset_stats(self)
 
     def update(self):
         keys = pygame.key.get_pressed()
         if keys[pygame.K_LEFT]:
-            self.rect.x -= 5
+            self.rect.x -= PLAYER_SPEED
         if keys[pygame.K_RIGHT]:
-            self.rect.x += 5
+            self.rect.x += PLAYER_SPEED
         if keys[pygame.K_UP]:
-            self.rect.y -= 5
+            self.rect.y -= PLAYER_SPEED
         if keys[pygame.K_DOWN]:
-            self.rect.y += 5
+            self.rect.y += PLAYER_SPEED
+        if keys[pygame.K_LEFT] or keys[pygame.K_RIGHT] or keys[pygame.K_UP] or keys[pygame.K_DOWN]:
+            self.dirty = 1
 
     def attack(self, enemy):
         enemy.health -= self.attack_power
 
 # Enemy class
-class Enemy(pygame.sprite.Sprite):
+class Enemy(pygame.sprite.DirtySprite):
     def __init__(self, x, y):
         super().__init__()
         self.image = pygame.Surface((50, 50))
         self.image.fill(RED)
         self.rect = self.image.get_rect()
+        self.reset(x, y)
+
+    def reset(self, x, y, health=50, attack_power=5, speed=2):
         self.rect.center = (x, y)
-        self.health = 50
-        self.attack_power = 5
+        self.dirty = 1
+        self.health = health
+        self.attack_power = attack_power
+        self.speed = speed
+        self.slot = None
 
-    def update(self):
-        if self.rect.x < player.rect.x:
-            self.rect.x += 2
-        if self.rect.x > player.rect.x:
-            self.rect.x -= 2
-        if self.rect.y < player.rect.y:
-            self.rect.y += 2
-        if self.rect.y > player.rect.y:
-            self.rect.y -= 2
+# Reuses dead sprites instead of allocating new ones for every spawn
+class SpritePool:
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+        self.created = 0
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            sprite = self.free.pop()
+        else:
+            sprite = self.factory(0, 0)
+            self.created += 1
+        sprite.reset(*args, **kwargs)
+        return sprite
+
+    def release(self, sprite):
+        sprite.kill()
+        self.free.append(sprite)
+
+# Waves spawned once when a battle state is entered
+BATTLE_WAVES = {
+    TUTORIAL_BATTLE: tutorial_wave,
+    FINAL_BATTLE: final_wave
+}
+
+# Spawns and despawns battle enemies through the pool; movement and
+# collision queries run on the swarm's position arrays
+class SpawnSystem:
+    def __init__(self, pool, swarm, *groups):
+        self.pool = pool
+        self.swarm = swarm
+        self.groups = groups
+
+    def spawn(self, **stats):
+        enemy = self.pool.acquire(**stats)
+        for group in self.groups:
+            group.add(enemy)
+        self.swarm.add(enemy, enemy.speed)
+        return enemy
+
+    def spawn_wave(self, state):
+        return [self.spawn(**stats) for stats in BATTLE_WAVES[state]()]
+
+    def despawn(self, enemy):
+        self.swarm.remove(enemy)
+        self.pool.release(enemy)
+
+# Health readout; re-rendered only when the value changes
+class StatusText(pygame.sprite.DirtySprite):
+    def __init__(self, x, y):
+        super().__init__()
+        self.text = None
+        self.topleft = (x, y)
+        self.set_text("")
+
+    def set_text(self, text):
+        if text == self.text:
+            return
+        self.text = text
+        self.image = HUD_FONT.render(text, True, BLACK, WHITE)
+        self.rect = self.image.get_rect(topleft=self.topleft)
+        self.dirty = 1
 
 # Quiz questions and responses
 quiz_questions = [
-    "What are you afraid of? (1: Getting old, 2: Being different, 3: Being indecisive)",
-    "What do you want out of life? (1: To see rare sights, 2: To broaden my horizons, 3: To be strong)",
-    "What's most important to you? (1: Being number one, 2: Friendship, 3: My prize possessions)"
+    ("What are you afraid of?", ["Getting old", "Being different", "Being indecisive"]),
+    ("What do you want out of life?", ["To see rare sights", "To broaden my horizons", "To be strong"]),
+    ("What's most important to you?", ["Being number one", "Friendship", "My prize possessions"])
 ]
 quiz_index = 0
 quiz_responses = []
 
 # Weapon choices
-weapons = ["Dream Sword", "Dream Shield", "Dream Rod"]
+weapons = WEAPONS
 chosen_weapon = None
 discarded_weapon = None
 
-# Sprite groups
-all_sprites = pygame.sprite.Group()
+# Sprite groups; all_sprites redraws only dirty regions over the background
+background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+background.fill(WHITE)
+all_sprites = pygame.sprite.LayeredDirty()
+all_sprites.clear(screen, background)
 enemies = pygame.sprite.Group()
 
+# Pools and spawning
+character_pool = SpritePool(Character)
+enemy_pool = SpritePool(Enemy)
+swarm = EnemySwarm()
+spawner = SpawnSystem(enemy_pool, swarm, all_sprites, enemies)
+
 # Create player
-player = Character(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50)
+player = character_pool.acquire(*PLAYER_START)
 all_sprites.add(player)
+status = StatusText(10, 10)
+all_sprites.add(status, layer=1)
+
+# Option rects of the menu on screen, for mouse selection
+menu_options = []
+menu_dirty = True
+
+# Draw a menu screen in full; only called when its contents change
+def draw_menu(title, options, hint=None):
+    global menu_options, menu_dirty
+    screen.blit(background, (0, 0))
+    title_image = TITLE_FONT.render(title, True, BLACK)
+    screen.blit(title_image, title_image.get_rect(midtop=(SCREEN_WIDTH // 2, 120)))
+    menu_options = []
+    for i, option in enumerate(options):
+        image = OPTION_FONT.render(f"{i+1}: {option}", True, BLUE)
+        rect = screen.blit(image, image.get_rect(midtop=(SCREEN_WIDTH // 2, 220 + i * 60)))
+        menu_options.append(rect.inflate(20, 20))
+    if hint:
+        hint_image = HUD_FONT.render(hint, True, BLACK)
+        screen.blit(hint_image, hint_image.get_rect(midtop=(SCREEN_WIDTH // 2, 440)))
+    pygame.display.flip()
+    menu_dirty = False
+
+# Map a key press (1-3) or a click on an option to a choice number
+def menu_choice(event):
+    if event.type == pygame.KEYDOWN:
+        keys = {pygame.K_1: 1, pygame.K_2: 2, pygame.K_3: 3, pygame.K_KP1: 1, pygame.K_KP2: 2, pygame.K_KP3: 3}
+        return keys.get(event.key)
+    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+        for i, rect in enumerate(menu_options):
+            if rect.collidepoint(event.pos):
+                return i + 1
+    return None
 
 # Function to handle quiz
-def handle_quiz():
-    global quiz_index, game_state
-    if quiz_index < len(quiz_questions):
-        print(quiz_questions[quiz_index])
-        response = input("Choose 1, 2, or 3: ")
-        quiz_responses.append(int(response))
-        quiz_index += 1
+def handle_quiz(choice):
+    global quiz_index, menu_dirty
+    quiz_responses.append(choice)
+    quiz_index += 1
+    menu_dirty = True
+    if quiz_index == len(quiz_questions):
+        apply_quiz_results(player, quiz_responses)
+        enter_state(WEAPON_SELECTION)
+
+# Function to handle weapon selection; the first choice picks, the second discards
+def handle_weapon_selection(choice):
+    global chosen_weapon, discarded_weapon, menu_dirty
+    menu_dirty = True
+    if chosen_weapon is None:
+        chosen_weapon = weapons[choice - 1]
+        return
+    discarded_weapon = weapons[choice - 1]
+    apply_weapon(player, chosen_weapon)
+    enter_state(TUTORIAL_BATTLE)
+
+# Draw the menu for the current quiz or weapon state
+def draw_current_menu():
+    if game_state == PERSONALITY_QUIZ:
+        question, options = quiz_questions[quiz_index]
+        draw_menu(question, options, f"Question {quiz_index + 1} of {len(quiz_questions)} - press 1, 2 or 3")
+    elif chosen_weapon is None:
+        draw_menu("Choose your weapon", weapons, "Press 1, 2 or 3")
     else:
-        # Adjust stats based on responses
-        if quiz_responses[0] == 1:
-            player.defense += 5
-        elif quiz_responses[0] == 2:
-            player.attack_power += 5
-        if quiz_responses[1] == 1:
-            player.health += 20
-        if quiz_responses[2] == 2:
-            player.health += 10
-            player.attack_power += 5
-        game_state = WEAPON_SELECTION
-
-# Function to handle weapon selection
-def handle_weapon_selection():
-    global chosen_weapon, discarded_weapon, game_state
-    print("Choose your weapon:")
-    for i, weapon in enumerate(weapons):
-        print(f"{i+1}: {weapon}")
-    choice = int(input("Choose 1, 2, or 3: ")) - 1
-    chosen_weapon = weapons[choice]
-    print("Discard a weapon:")
-    discard_choice = int(input("Choose 1, 2, or 3: ")) - 1
-    discarded_weapon = weapons[discard_choice]
-    # Adjust stats based on weapon choice
-    if chosen_weapon == "Dream Sword":
-        player.attack_power += 10
-    elif chosen_weapon == "Dream Shield":
-        player.defense += 10
-    elif chosen_weapon == "Dream Rod":
-        player.health += 20
-    game_state = TUTORIAL_BATTLE
+        draw_menu("Discard a weapon", weapons, f"You chose the {chosen_weapon}")
+
+# Switch states, spawning the new battle's wave exactly once
+def enter_state(state):
+    global game_state, accumulator
+    entering_battle = state in BATTLE_WAVES and game_state not in BATTLE_WAVES
+    game_state = state
+    accumulator = 0.0
+    if state in BATTLE_WAVES:
+        spawner.spawn_wave(state)
+    if entering_battle:
+        # The menu covered the whole screen; repaint it once, then go dirty-rect only
+        screen.blit(background, (0, 0))
+        all_sprites.repaint_rect(screen.get_rect())
+
+# One fixed simulation step of a battle
+def battle_step():
+    global running
+    player.update()
+    swarm.step(player.rect.topleft)
+    # Check for collisions and attacks; only touching enemies can take damage
+    for enemy in resolve_contacts(player, swarm.colliding(player.rect)):
+        spawner.despawn(enemy)
+    if player.health <= 0:
+        print("Game Over")
+        running = False
+    elif len(enemies) == 0:
+        if game_state == TUTORIAL_BATTLE:
+            enter_state(FINAL_BATTLE)
+        else:
+            print("You Win!")
+            running = False
 
 # Game loop
 running = True
+accumulator = 0.0
 while running:
+    frame_time = min(clock.tick(FPS) / 1000.0, MAX_FRAME_TIME)
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+        elif game_state in (PERSONALITY_QUIZ, WEAPON_SELECTION):
+            choice = menu_choice(event)
+            if choice is None:
+                continue
+            if game_state == PERSONALITY_QUIZ:
+                handle_quiz(choice)
+            else:
+                handle_weapon_selection(choice)
 
-    if game_state == PERSONALITY_QUIZ:
-        handle_quiz()
-    elif game_state == WEAPON_SELECTION:
-        handle_weapon_selection()
-    elif game_state == TUTORIAL_BATTLE:
-        # Create enemies for tutorial battle
-        if len(enemies) == 0:
-            for _ in range(3):
-                enemy = Enemy(random.randint(0, SCREEN_WIDTH), random.randint(0, SCREEN_HEIGHT // 2))
-                all_sprites.add(enemy)
-                enemies.add(enemy)
-        # Update and draw everything
-        all_sprites.update()
-        screen.fill(WHITE)
-        all_sprites.draw(screen)
-        pygame.display.flip()
-        clock.tick(FPS)
-        # Check for collisions and attacks
-        for enemy in enemies:
-            if pygame.sprite.collide_rect(player, enemy):
-                player.health -= enemy.attack_power
-                enemy.health -= player.attack_power
-            if enemy.health <= 0:
-                enemy.kill()
-        if player.health <= 0:
-            print("Game Over")
-            running = False
-        if len(enemies) == 0:
-            game_state = FINAL_BATTLE
-    elif game_state == FINAL_BATTLE:
-        # Create boss for final battle
-        boss = Enemy(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-        boss.health = 200
-        boss.attack_power = 20
-        all_sprites.add(boss)
-        enemies.add(boss)
-        # Update and draw everything
-        all_sprites.update()
-        screen.fill(WHITE)
-        all_sprites.draw(screen)
-        pygame.display.flip()
-        clock.tick(FPS)
-        # Check for collisions and attacks
-        if pygame.sprite.collide_rect(player, boss):
-            player.health -= boss.attack_power
-            boss.health -= player.attack_power
-        if player.health <= 0:
-            print("Game Over")
-            running = False
-        if boss.health <= 0:
-            print("You Win!")
-            running = False
+    if game_state in (PERSONALITY_QUIZ, WEAPON_SELECTION):
+        if menu_dirty:
+            draw_current_menu()
+    elif game_state in (TUTORIAL_BATTLE, FINAL_BATTLE):
+        accumulator += frame_time
+        while running and accumulator >= SIM_DT:
+            battle_step()
+            accumulator -= SIM_DT
+        # Redraw only what moved or changed since the last frame
+        swarm.sync_rects()
+        status.set_text(f"Health: {max(player.health, 0)}")
+        pygame.display.update(all_sprites.draw(screen))
 
 pygame.quit()
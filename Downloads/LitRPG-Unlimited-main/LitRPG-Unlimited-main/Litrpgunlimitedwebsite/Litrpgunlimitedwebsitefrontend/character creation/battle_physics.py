@@ -0,0 +1,148 @@
+import numpy as np
+
+# Grid cell size; at least as large as the biggest sprite so a rect query
+# only has to look one cell beyond the rect it is testing
+CELL_SIZE = 64
+
+# Packs (cell_x, cell_y) into one integer key; offset keeps negative cells positive
+_KEY_OFFSET = 1 << 15
+_KEY_STRIDE = 1 << 16
+
+
+def cell_keys(x, y):
+    cx = np.floor_divide(x, CELL_SIZE).astype(np.int64) + _KEY_OFFSET
+    cy = np.floor_divide(y, CELL_SIZE).astype(np.int64) + _KEY_OFFSET
+    return cx * _KEY_STRIDE + cy
+
+
+# Uniform-grid spatial hash of integer ids, each filed under the cell of its top-left corner
+class SpatialHash:
+    def __init__(self):
+        self.buckets = {}
+
+    def insert(self, item, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = set()
+        bucket.add(item)
+
+    def remove(self, item, key):
+        bucket = self.buckets[key]
+        bucket.discard(item)
+        if not bucket:
+            del self.buckets[key]
+
+    def move(self, item, old_key, new_key):
+        self.remove(item, old_key)
+        self.insert(item, new_key)
+
+    def query(self, left, top, right, bottom, reach=CELL_SIZE):
+        # Items are filed by top-left, so anything overlapping the rect starts
+        # at most one sprite width (reach) above or left of it
+        x0, y0 = (left - reach) // CELL_SIZE, (top - reach) // CELL_SIZE
+        x1, y1 = right // CELL_SIZE, bottom // CELL_SIZE
+        found = []
+        for cx in range(x0, x1 + 1):
+            column = (cx + _KEY_OFFSET) * _KEY_STRIDE + _KEY_OFFSET
+            for cy in range(y0, y1 + 1):
+                bucket = self.buckets.get(column + cy)
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+
+# Enemy positions, sizes and speeds in dense NumPy arrays so a whole horde
+# chases its target in a handful of vectorized operations per step
+class EnemySwarm:
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.positions = np.zeros((capacity, 2), dtype=np.float64)
+        self.sizes = np.zeros((capacity, 2), dtype=np.float64)
+        self.speeds = np.zeros(capacity, dtype=np.float64)
+        self.keys = np.zeros(capacity, dtype=np.int64)
+        self.sprites = [None] * capacity
+        self.grid = SpatialHash()
+        self.max_size = 0
+
+    def _grow(self):
+        capacity = len(self.sprites) * 2
+        for name in ('positions', 'sizes', 'speeds', 'keys'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.sprites.extend([None] * (capacity - len(self.sprites)))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, sprite, speed=2.0):
+        if self.count == len(self.sprites):
+            self._grow()
+        slot = self.count
+        self.count += 1
+        self.positions[slot] = sprite.rect.topleft
+        self.sizes[slot] = sprite.rect.size
+        self.max_size = max(self.max_size, *sprite.rect.size)
+        self.speeds[slot] = speed
+        self.keys[slot] = cell_keys(self.positions[slot, 0], self.positions[slot, 1])
+        self.sprites[slot] = sprite
+        sprite.slot = slot
+        self.grid.insert(slot, int(self.keys[slot]))
+
+    def remove(self, sprite):
+        sprite.rect.topleft = self.positions[sprite.slot].astype(int).tolist()
+        # Swap the last enemy into the freed slot to keep the arrays dense
+        slot, last = sprite.slot, self.count - 1
+        self.grid.remove(slot, int(self.keys[slot]))
+        if slot != last:
+            moved = self.sprites[last]
+            self.grid.remove(last, int(self.keys[last]))
+            for array in (self.positions, self.sizes, self.speeds, self.keys):
+                array[slot] = array[last]
+            self.sprites[slot] = moved
+            moved.slot = slot
+            self.grid.insert(slot, int(self.keys[slot]))
+        self.sprites[last] = None
+        sprite.slot = None
+        self.count -= 1
+
+    # Move every enemy toward target's top-left by at most its speed per axis
+    def step(self, target):
+        n = self.count
+        if n == 0:
+            return
+        positions = self.positions[:n]
+        delta = np.asarray(target, dtype=np.float64) - positions
+        speeds = self.speeds[:n, None]
+        positions += np.clip(delta, -speeds, speeds)
+
+        # Re-file only the enemies that crossed into a new cell
+        keys = cell_keys(positions[:, 0], positions[:, 1])
+        changed = np.flatnonzero(keys != self.keys[:n])
+        if len(changed):
+            old_keys = self.keys[changed].tolist()
+            new_keys = keys[changed].tolist()
+            for slot, old_key, new_key in zip(changed.tolist(), old_keys, new_keys):
+                self.grid.move(slot, old_key, new_key)
+            self.keys[:n] = keys
+
+    # Enemies whose rects overlap rect: grid broadphase, then an exact AABB test
+    def colliding(self, rect):
+        candidates = self.grid.query(rect.left, rect.top, rect.right, rect.bottom,
+                                     reach=self.max_size)
+        if not candidates:
+            return []
+        slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        left, top = self.positions[slots, 0], self.positions[slots, 1]
+        right, bottom = left + self.sizes[slots, 0], top + self.sizes[slots, 1]
+        hits = (left < rect.right) & (right > rect.left) & (top < rect.bottom) & (bottom > rect.top)
+        return [self.sprites[slot] for slot in slots[hits].tolist()]
+
+    # Copy simulated positions onto the sprite rects before drawing, flagging
+    # the sprites that moved for dirty-rect renderers
+    def sync_rects(self):
+        for sprite, position in zip(self.sprites, self.positions[:self.count].astype(int).tolist()):
+            if sprite.rect.topleft != tuple(position):
+                sprite.rect.topleft = position
+                sprite.dirty = 1
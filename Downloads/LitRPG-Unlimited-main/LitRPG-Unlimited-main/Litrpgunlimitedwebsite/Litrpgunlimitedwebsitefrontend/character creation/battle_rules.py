@@ -0,0 +1,60 @@
+import random
+
+# Rules shared by the game and the headless battle simulator; nothing here
+# touches the display or reads input
+
+ARENA_WIDTH = 800
+ARENA_HEIGHT = 600
+
+PLAYER_SPEED = 5
+PLAYER_START = (ARENA_WIDTH // 2, ARENA_HEIGHT - 50)
+
+WEAPONS = ["Dream Sword", "Dream Shield", "Dream Rod"]
+
+# Base stats every character starts with
+def reset_stats(character):
+    character.health = 100
+    character.attack_power = 10
+    character.defense = 5
+
+# Adjust stats based on the three quiz responses (each 1, 2 or 3)
+def apply_quiz_results(character, responses):
+    if responses[0] == 1:
+        character.defense += 5
+    elif responses[0] == 2:
+        character.attack_power += 5
+    if responses[1] == 1:
+        character.health += 20
+    if responses[2] == 2:
+        character.health += 10
+        character.attack_power += 5
+
+# Adjust stats based on weapon choice
+def apply_weapon(character, weapon):
+    if weapon == "Dream Sword":
+        character.attack_power += 10
+    elif weapon == "Dream Shield":
+        character.defense += 10
+    elif weapon == "Dream Rod":
+        character.health += 20
+
+# Enemy spawn stats for each battle, drawn from rng so runs can be replayed
+def tutorial_wave(rng=random):
+    return [
+        dict(x=rng.randint(0, ARENA_WIDTH), y=rng.randint(0, ARENA_HEIGHT // 2))
+        for _ in range(3)
+    ]
+
+def final_wave(rng=random):
+    return [dict(x=ARENA_WIDTH // 2, y=ARENA_HEIGHT // 2, health=200, attack_power=20)]
+
+# Touching enemies and the player trade blows once per simulation step;
+# returns the enemies that died
+def resolve_contacts(player, touching):
+    dead = []
+    for enemy in touching:
+        player.health -= enemy.attack_power
+        enemy.health -= player.attack_power
+        if enemy.health <= 0:
+            dead.append(enemy)
+    return dead
@@ -0,0 +1,268 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from battle_physics import EnemySwarm
+from battle_rules import (PLAYER_SPEED, PLAYER_START, WEAPONS, apply_quiz_results, apply_weapon, final_wave,
+                          reset_stats, resolve_contacts, tutorial_wave)
+
+# Headless balance sweeps: every quiz x weapon build fights the tutorial and
+# final battles with the game's own rules, without a display or input()
+
+SIM_RATE = 60  # simulation steps per second, matching the game's SIM_DT
+
+# Player movement per step for each policy direction
+DIRECTIONS = [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+
+# Stand-in for the game's sprites: just a rect and stats
+class Fighter:
+    def __init__(self, x, y, health=50, attack_power=5, speed=2):
+        self.rect = pygame.Rect(0, 0, 50, 50)
+        self.rect.center = (x, y)
+        self.health = health
+        self.attack_power = attack_power
+        self.speed = speed
+        self.slot = None
+
+
+# Stat-affecting choices; the discarded weapon never changes stats, so it is not swept
+def all_builds():
+    return [
+        (responses, weapon)
+        for responses in itertools.product((1, 2, 3), repeat=3)
+        for weapon in WEAPONS
+    ]
+
+
+# Fight both battles once; 'hold' stands still, 'wander' holds a random
+# direction for a random number of steps like an inattentive player
+def simulate_fight(responses, weapon, seed, policy="wander", max_seconds=120):
+    rng = random.Random(seed)
+    player = Fighter(*PLAYER_START)
+    reset_stats(player)
+    apply_quiz_results(player, responses)
+    apply_weapon(player, weapon)
+
+    swarm = EnemySwarm(capacity=4)
+    battles = [tutorial_wave, final_wave]
+    stage = 0
+    for stats in battles[stage](rng):
+        enemy = Fighter(**stats)
+        swarm.add(enemy, enemy.speed)
+
+    direction, hold = (0, 0), 0
+    for step in range(1, max_seconds * SIM_RATE + 1):
+        if policy == "wander":
+            if hold == 0:
+                direction, hold = DIRECTIONS[rng.choice(range(len(DIRECTIONS)))], rng.randint(5, 40)
+            hold -= 1
+            player.rect.move_ip(direction[0] * PLAYER_SPEED, direction[1] * PLAYER_SPEED)
+
+        swarm.step(player.rect.topleft)
+        for enemy in resolve_contacts(player, swarm.colliding(player.rect)):
+            swarm.remove(enemy)
+
+        if player.health <= 0:
+            return dict(win=False, steps=step, stage=stage, health=player.health)
+        if len(swarm) == 0:
+            stage += 1
+            if stage == len(battles):
+                return dict(win=True, steps=step, stage=stage, health=player.health)
+            for stats in battles[stage](rng):
+                enemy = Fighter(**stats)
+                swarm.add(enemy, enemy.speed)
+
+    return dict(win=False, steps=max_seconds * SIM_RATE, stage=stage, health=player.health, timeout=True)
+
+
+# Many fights stepped in lockstep over NumPy arrays, one row per fight. Applies
+# exactly the rules of simulate_fight (and draws the same random numbers per
+# seed), so results match it fight for fight at a fraction of the cost.
+def simulate_batch(fights, policy="wander", max_seconds=120):
+    count = len(fights)
+    slots = max(len(tutorial_wave(random.Random(0))), len(final_wave(random.Random(0))))
+    rngs = [random.Random(seed) for _, _, seed in fights]
+
+    player_pos = np.empty((count, 2), dtype=np.int64)
+    player_health = np.empty(count, dtype=np.int64)
+    player_attack = np.empty(count, dtype=np.int64)
+    for i, (responses, weapon, _) in enumerate(fights):
+        player = Fighter(*PLAYER_START)
+        reset_stats(player)
+        apply_quiz_results(player, responses)
+        apply_weapon(player, weapon)
+        player_pos[i] = player.rect.topleft
+        player_health[i] = player.health
+        player_attack[i] = player.attack_power
+    player_size = np.array(player.rect.size, dtype=np.float64)
+
+    enemy_pos = np.zeros((count, slots, 2))
+    enemy_size = np.zeros((count, slots, 2))
+    enemy_speed = np.zeros((count, slots, 1))
+    enemy_health = np.zeros((count, slots), dtype=np.int64)
+    enemy_attack = np.zeros((count, slots), dtype=np.int64)
+    alive = np.zeros((count, slots), dtype=bool)
+
+    def spawn(i, wave):
+        for slot, stats in enumerate(wave):
+            enemy = Fighter(**stats)
+            enemy_pos[i, slot] = enemy.rect.topleft
+            enemy_size[i, slot] = enemy.rect.size
+            enemy_speed[i, slot] = enemy.speed
+            enemy_health[i, slot] = enemy.health
+            enemy_attack[i, slot] = enemy.attack_power
+            alive[i, slot] = True
+
+    battles = [tutorial_wave, final_wave]
+    stage = np.zeros(count, dtype=np.int64)
+    for i in range(count):
+        spawn(i, battles[0](rngs[i]))
+
+    direction = np.zeros((count, 2), dtype=np.int64)
+    hold = np.zeros(count, dtype=np.int64)
+    moves = np.array(DIRECTIONS, dtype=np.int64) * PLAYER_SPEED
+    outcome = [None] * count
+    active = np.arange(count)
+    max_steps = max_seconds * SIM_RATE
+
+    for step in range(1, max_steps + 1):
+        if policy == "wander":
+            for i in active[hold[active] == 0].tolist():
+                choice = rngs[i].choice(range(len(DIRECTIONS)))
+                direction[i], hold[i] = moves[choice], rngs[i].randint(5, 40)
+            hold[active] -= 1
+            player_pos[active] += direction[active]
+
+        pos = enemy_pos[active]
+        delta = player_pos[active, None, :] - pos
+        speed = enemy_speed[active]
+        pos += np.clip(delta, -speed, speed)
+        enemy_pos[active] = pos
+
+        # Same AABB test as EnemySwarm.colliding, for every live enemy at once
+        player_min = player_pos[active, None, :]
+        player_max = player_min + player_size
+        touching = alive[active] & np.all((pos < player_max) & (pos + enemy_size[active] > player_min), axis=2)
+        player_health[active] -= (enemy_attack[active] * touching).sum(axis=1)
+        health = enemy_health[active] - player_attack[active, None] * touching
+        enemy_health[active] = health
+        alive[active] &= ~(touching & (health <= 0))
+
+        lost = player_health[active] <= 0
+        cleared = ~lost & ~alive[active].any(axis=1)
+        if lost.any() or cleared.any():
+            for i in active[lost].tolist():
+                outcome[i] = dict(win=False, steps=step, stage=int(stage[i]), health=int(player_health[i]))
+            for i in active[cleared].tolist():
+                stage[i] += 1
+                if stage[i] == len(battles):
+                    outcome[i] = dict(win=True, steps=step, stage=int(stage[i]), health=int(player_health[i]))
+                else:
+                    spawn(i, battles[stage[i]](rngs[i]))
+            active = active[~lost & ~(cleared & (stage[active] == len(battles)))]
+            if len(active) == 0:
+                break
+
+    for i in active.tolist():
+        outcome[i] = dict(win=False, steps=max_steps, stage=int(stage[i]), health=int(player_health[i]), timeout=True)
+    return outcome
+
+
+# Summarise one build's fights
+def summarise(responses, weapon, fights):
+    durations = [fight["steps"] / SIM_RATE for fight in fights]
+    wins = [fight for fight in fights if fight["win"]]
+    return {
+        "quiz": list(responses),
+        "weapon": weapon,
+        "fights": len(fights),
+        "win_rate": round(len(wins) / len(fights), 4),
+        "timeouts": sum(1 for fight in fights if fight.get("timeout")),
+        "mean_duration_s": round(statistics.fmean(durations), 3),
+        "median_duration_s": round(statistics.median(durations), 3),
+        "p90_duration_s": round(sorted(durations)[int(0.9 * (len(durations) - 1))], 3),
+        "mean_health_left_on_win": round(statistics.fmean(f["health"] for f in wins), 1) if wins else None,
+        "reached_final": round(sum(1 for fight in fights if fight["stage"] >= 1) / len(fights), 4)
+    }
+
+
+# One worker task: a chunk of builds against every seed as a single batch
+def run_builds(builds, seeds, policy, max_seconds):
+    fights = [(responses, weapon, seed) for responses, weapon in builds for seed in seeds]
+    outcomes = simulate_batch(fights, policy, max_seconds)
+    return [
+        summarise(responses, weapon, outcomes[i * len(seeds):(i + 1) * len(seeds)])
+        for i, (responses, weapon) in enumerate(builds)
+    ]
+
+
+def run_sweep(seeds=100, workers=None, policy="wander", max_seconds=120, base_seed=0):
+    seed_list = list(range(base_seed, base_seed + seeds))
+    builds = all_builds()
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker balances load while keeping batches large
+    chunk_count = min(len(builds), workers * 4) if workers > 1 else 1
+    chunks = [builds[i::chunk_count] for i in range(chunk_count)]
+    started = time.perf_counter()
+    if workers == 1:
+        results = [summary for chunk in chunks for summary in run_builds(chunk, seed_list, policy, max_seconds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [
+                summary
+                for chunk_results in executor.map(
+                    run_builds, chunks,
+                    itertools.repeat(seed_list), itertools.repeat(policy), itertools.repeat(max_seconds)
+                )
+                for summary in chunk_results
+            ]
+    elapsed = time.perf_counter() - started
+    # Best builds first: most wins, then furthest progress, then longest survival
+    results.sort(key=lambda build: (-build["win_rate"], -build["reached_final"], -build["mean_duration_s"]))
+    return {
+        "policy": policy,
+        "builds": len(builds),
+        "seeds_per_build": seeds,
+        "fights": len(builds) * seeds,
+        "elapsed_s": round(elapsed, 3),
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless battle balance sweep over quiz and weapon builds")
+    parser.add_argument("--seeds", type=int, default=100, help="fights per build")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--policy", choices=["wander", "hold"], default="wander", help="simulated player movement")
+    parser.add_argument("--max-seconds", type=int, default=120, help="simulated time limit per fight")
+    parser.add_argument("--base-seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    report = run_sweep(args.seeds, args.workers, args.policy, args.max_seconds, args.base_seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['fights']} fights ({report['builds']} builds x {report['seeds_per_build']} seeds, "
+          f"policy {report['policy']}) in {report['elapsed_s']}s")
+    print(f"{'quiz':<10}{'weapon':<14}{'win rate':>9}{'to boss':>9}{'mean s':>9}{'p90 s':>9}{'hp left':>9}")
+    for build in report["results"]:
+        health = build["mean_health_left_on_win"]
+        print(f"{'-'.join(map(str, build['quiz'])):<10}{build['weapon']:<14}{build['win_rate']:>9.1%}{build['reached_final']:>9.1%}"
+              f"{build['mean_duration_s']:>9.2f}{build['p90_duration_s']:>9.2f}"
+              f"{'-' if health is None else health:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import struct
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+# Builds every race/class model in one go. Runs either inside a single
+# Blender session or, with no Blender at all, through the pure-Python glTF
+# writer below. Assets whose definition has not changed are skipped.
+#
+#   python build_models.py                       pure Python, all models
+#   python build_models.py --backend blender     shards across Blender processes
+#   blender -b --python build_models.py -- ...   one Blender session
+
+# Bump when the generated output changes for an unchanged definition
+BUILDER_VERSION = 1
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_NAME = ".build_manifest.json"
+
+# Declarative model table: name -> Blender primitive and its arguments
+MODELS = {
+    "dwarf": {"object": "Dwarf", "primitive": "uv_sphere", "params": {"radius": 1}},
+    "elf": {"object": "Elf", "primitive": "cone", "params": {"vertices": 10, "radius1": 1, "depth": 2}},
+    "human": {"object": "Human", "primitive": "cylinder", "params": {"radius": 1, "depth": 2}},
+    "mage": {"object": "Mage", "primitive": "torus", "params": {"major_radius": 1, "minor_radius": 0.25}},
+    "orc": {"object": "Orc", "primitive": "ico_sphere", "params": {"radius": 1}},
+    "ranger": {"object": "Ranger", "primitive": "cylinder", "params": {"radius": 0.75, "depth": 2}},
+    "rogue": {"object": "Rogue", "primitive": "cone", "params": {"vertices": 8, "radius1": 1, "depth": 2}},
+    "warrior": {"object": "Warrior", "primitive": "cube", "params": {"size": 1}},
+}
+
+# Blender's defaults for the arguments the table leaves out
+PRIMITIVE_DEFAULTS = {
+    "uv_sphere": {"segments": 32, "ring_count": 16, "radius": 1.0},
+    "ico_sphere": {"subdivisions": 2, "radius": 1.0},
+    "cylinder": {"vertices": 32, "radius": 1.0, "depth": 2.0},
+    "cone": {"vertices": 32, "radius1": 1.0, "radius2": 0.0, "depth": 2.0},
+    "torus": {"major_segments": 48, "minor_segments": 12, "major_radius": 1.0, "minor_radius": 0.25},
+    "cube": {"size": 2.0},
+}
+
+# How each primitive coarsens per LOD level
+LOD_REDUCERS = {
+    "uv_sphere": lambda p: {**p, "segments": max(p["segments"] // 2, 6), "ring_count": max(p["ring_count"] // 2, 3)},
+    "ico_sphere": lambda p: {**p, "subdivisions": max(p["subdivisions"] - 1, 1)},
+    "cylinder": lambda p: {**p, "vertices": max(p["vertices"] // 2, 6)},
+    "cone": lambda p: {**p, "vertices": max(p["vertices"] // 2, 6)},
+    "torus": lambda p: {**p, "major_segments": max(p["major_segments"] // 2, 6),
+                        "minor_segments": max(p["minor_segments"] // 2, 4)},
+    "cube": lambda p: p,
+}
+
+# Screen coverage below which each successive LOD takes over
+LOD_COVERAGE = [0.25, 0.1, 0.04, 0.0]
+
+
+def definition_hash(name, options):
+    payload = {"name": name, "model": MODELS[name], "options": options, "version": BUILDER_VERSION}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+# Primitive meshes in Blender's Z-up space, as (vertices, polygons)
+
+def uv_sphere(segments, ring_count, radius):
+    vertices = [(0.0, 0.0, radius)]
+    for ring in range(1, ring_count):
+        theta = math.pi * ring / ring_count
+        for segment in range(segments):
+            phi = 2 * math.pi * segment / segments
+            vertices.append((radius * math.sin(theta) * math.cos(phi),
+                             radius * math.sin(theta) * math.sin(phi),
+                             radius * math.cos(theta)))
+    vertices.append((0.0, 0.0, -radius))
+    bottom = len(vertices) - 1
+
+    def ring_vertex(ring, segment):
+        return 1 + ring * segments + segment % segments
+
+    polygons = [(0, ring_vertex(0, s), ring_vertex(0, s + 1)) for s in range(segments)]
+    for ring in range(ring_count - 2):
+        for s in range(segments):
+            polygons.append((ring_vertex(ring, s), ring_vertex(ring + 1, s),
+                             ring_vertex(ring + 1, s + 1), ring_vertex(ring, s + 1)))
+    last = ring_count - 2
+    polygons += [(ring_vertex(last, s + 1), ring_vertex(last, s), bottom) for s in range(segments)]
+    return vertices, polygons
+
+
+def ico_sphere(subdivisions, radius):
+    t = (1 + math.sqrt(5)) / 2
+    vertices = [(-1, t, 0), (1, t, 0), (-1, -t, 0), (1, -t, 0), (0, -1, t), (0, 1, t),
+                (0, -1, -t), (0, 1, -t), (t, 0, -1), (t, 0, 1), (-t, 0, -1), (-t, 0, 1)]
+    faces = [(0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11), (1, 5, 9), (5, 11, 4),
+             (11, 10, 2), (10, 7, 6), (7, 1, 8), (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8),
+             (3, 8, 9), (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)]
+    vertices = [tuple(c / math.sqrt(1 + t * t) for c in v) for v in vertices]
+    # Blender counts the bare icosahedron as one subdivision
+    for _ in range(subdivisions - 1):
+        midpoints = {}
+
+        def midpoint(a, b):
+            key = (min(a, b), max(a, b))
+            if key not in midpoints:
+                m = [(p + q) / 2 for p, q in zip(vertices[a], vertices[b])]
+                length = math.sqrt(sum(c * c for c in m))
+                vertices.append(tuple(c / length for c in m))
+                midpoints[key] = len(vertices) - 1
+            return midpoints[key]
+
+        subdivided = []
+        for a, b, c in faces:
+            ab, bc, ca = midpoint(a, b), midpoint(b, c), midpoint(c, a)
+            subdivided += [(a, ab, ca), (b, bc, ab), (c, ca, bc), (ab, bc, ca)]
+        faces = subdivided
+    return [tuple(radius * c for c in v) for v in vertices], faces
+
+
+def cone(vertices, radius1, radius2, depth):
+    half = depth / 2
+    ring = [(math.cos(2 * math.pi * i / vertices), math.sin(2 * math.pi * i / vertices)) for i in range(vertices)]
+    points = [(radius1 * x, radius1 * y, -half) for x, y in ring]
+    polygons = [tuple(reversed(range(vertices)))]  # bottom cap faces down
+    if radius2 > 0:
+        points += [(radius2 * x, radius2 * y, half) for x, y in ring]
+        polygons.append(tuple(range(vertices, 2 * vertices)))
+        polygons += [(i, (i + 1) % vertices, vertices + (i + 1) % vertices, vertices + i) for i in range(vertices)]
+    else:
+        points.append((0.0, 0.0, half))
+        polygons += [(i, (i + 1) % vertices, vertices) for i in range(vertices)]
+    return points, polygons
+
+
+def cylinder(vertices, radius, depth):
+    return cone(vertices, radius, radius, depth)
+
+
+def torus(major_segments, minor_segments, major_radius, minor_radius):
+    points = []
+    for i in range(major_segments):
+        u = 2 * math.pi * i / major_segments
+        for j in range(minor_segments):
+            v = 2 * math.pi * j / minor_segments
+            r = major_radius + minor_radius * math.cos(v)
+            points.append((r * math.cos(u), r * math.sin(u), minor_radius * math.sin(v)))
+
+    def index(i, j):
+        return (i % major_segments) * minor_segments + j % minor_segments
+
+    polygons = [(index(i, j), index(i + 1, j), index(i + 1, j + 1), index(i, j + 1))
+                for i in range(major_segments) for j in range(minor_segments)]
+    return points, polygons
+
+
+def cube(size):
+    h = size / 2
+    points = [(x, y, z) for x in (-h, h) for y in (-h, h) for z in (-h, h)]
+    polygons = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    return points, polygons
+
+
+PRIMITIVES = {
+    "uv_sphere": uv_sphere,
+    "ico_sphere": ico_sphere,
+    "cylinder": cylinder,
+    "cone": cone,
+    "torus": torus,
+    "cube": cube,
+}
+
+
+def primitive_params(model):
+    params = dict(PRIMITIVE_DEFAULTS[model["primitive"]])
+    params.update(model["params"])
+    return params
+
+
+# Triangle positions and normals with flat shading, converted to glTF's Y-up
+def flat_triangles(points, polygons):
+    points = np.asarray(points, dtype=np.float64)
+    triangles = [(polygon[0], polygon[i], polygon[i + 1])
+                 for polygon in polygons for i in range(1, len(polygon) - 1)]
+    corners = points[np.asarray(triangles)]  # (T, 3, 3)
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    positions = corners.reshape(-1, 3)
+    normals = np.repeat(normals, 3, axis=0)
+    # Blender Z-up to glTF Y-up: (x, y, z) -> (x, z, -y)
+    to_gltf = np.array([[1, 0, 0], [0, 0, -1], [0, 1, 0]], dtype=np.float64)
+    return positions @ to_gltf, normals @ to_gltf
+
+
+# Share vertices whose position and normal match; returns vertices and indices
+def weld(positions, normals, decimals=6):
+    keys = np.round(np.hstack([positions, normals]), decimals)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return positions[first], normals[first], inverse.reshape(-1).astype(np.uint32)
+
+
+# Minimal glTF 2.0 binary writer for static, untextured meshes
+class GLBWriter:
+
+    def __init__(self, generator):
+        self.gltf = {"asset": {"version": "2.0", "generator": generator},
+                     "buffers": [], "bufferViews": [], "accessors": [], "meshes": [], "nodes": []}
+        self.binary = bytearray()
+        self.extensions = set()
+        self.required = set()
+
+    def _view(self, data, target, stride=None):
+        while len(self.binary) % 4:
+            self.binary.append(0)
+        view = {"buffer": 0, "byteOffset": len(self.binary), "byteLength": len(data), "target": target}
+        if stride:
+            view["byteStride"] = stride
+        self.binary += data
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def _accessor(self, view, component_type, count, kind, normalized=False, minimum=None, maximum=None):
+        accessor = {"bufferView": view, "componentType": component_type, "count": count, "type": kind}
+        if normalized:
+            accessor["normalized"] = True
+        if minimum is not None:
+            accessor["min"], accessor["max"] = minimum, maximum
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    # Add a mesh and the node placing it; returns the node index
+    def add_mesh(self, name, positions, normals, indices, quantize):
+        node = {"name": name}
+        if quantize:
+            # int16 positions in a unit cube, mapped back by the node's TRS; a
+            # uniform scale keeps normals correct without renormalising
+            low, high = positions.min(axis=0), positions.max(axis=0)
+            center = (low + high) / 2
+            scale = float(max((high - low).max() / 2, 1e-9))
+            q = np.round((positions - center) / scale * 32767).astype(np.int16)
+            padded = np.zeros((len(q), 4), dtype=np.int16)  # attributes need 4-byte strides
+            padded[:, :3] = q
+            position = self._accessor(self._view(padded.tobytes(), 34962, 8), 5122, len(q), "VEC3", True,
+                                      q.min(axis=0).tolist(), q.max(axis=0).tolist())
+            n = np.zeros((len(normals), 4), dtype=np.int8)
+            n[:, :3] = np.round(normals * 127)
+            normal = self._accessor(self._view(n.tobytes(), 34962, 4), 5120, len(n), "VEC3", True)
+            node["translation"] = center.tolist()
+            node["scale"] = [scale] * 3
+            self.extensions.add("KHR_mesh_quantization")
+            self.required.add("KHR_mesh_quantization")
+        else:
+            p = positions.astype(np.float32)
+            position = self._accessor(self._view(p.tobytes(), 34962), 5126, len(p), "VEC3",
+                                      minimum=p.min(axis=0).tolist(), maximum=p.max(axis=0).tolist())
+            normal = self._accessor(self._view(normals.astype(np.float32).tobytes(), 34962), 5126,
+                                    len(normals), "VEC3")
+
+        index_type, component = (np.uint16, 5123) if len(positions) < 65536 else (np.uint32, 5125)
+        index = self._accessor(self._view(indices.astype(index_type).tobytes(), 34963), component,
+                               len(indices), "SCALAR")
+
+        self.gltf["meshes"].append({"name": name, "primitives": [
+            {"attributes": {"POSITION": position, "NORMAL": normal}, "indices": index, "mode": 4}
+        ]})
+        node["mesh"] = len(self.gltf["meshes"]) - 1
+        self.gltf["nodes"].append(node)
+        return len(self.gltf["nodes"]) - 1
+
+    # Attach coarser nodes to a node through MSFT_lod; they stay out of the scene
+    def set_lods(self, node, lod_nodes, coverage):
+        self.gltf["nodes"][node]["extensions"] = {"MSFT_lod": {"ids": lod_nodes}}
+        self.gltf["nodes"][node]["extras"] = {"MSFT_screencoverage": coverage}
+        self.extensions.add("MSFT_lod")
+
+    def to_bytes(self, scene_nodes):
+        self.gltf["scenes"] = [{"nodes": scene_nodes}]
+        self.gltf["scene"] = 0
+        while len(self.binary) % 4:
+            self.binary.append(0)
+        self.gltf["buffers"] = [{"byteLength": len(self.binary)}]
+        if self.extensions:
+            self.gltf["extensionsUsed"] = sorted(self.extensions)
+        if self.required:
+            self.gltf["extensionsRequired"] = sorted(self.required)
+        document = json.dumps(self.gltf, separators=(",", ":")).encode()
+        document += b" " * (-len(document) % 4)
+        length = 12 + 8 + len(document) + 8 + len(self.binary)
+        return b"".join([
+            struct.pack("<4sII", b"glTF", 2, length),
+            struct.pack("<I4s", len(document), b"JSON"), document,
+            struct.pack("<I4s", len(self.binary), b"BIN\0"), bytes(self.binary),
+        ])
+
+
+# Pure-Python export of one model with optional quantization and LODs
+def build_python(name, out_dir, quantize=True, lods=2):
+    model = MODELS[name]
+    params = primitive_params(model)
+    writer = GLBWriter("LitRPG build_models.py")
+    levels = []
+    for level in range(lods + 1):
+        positions, normals = flat_triangles(*PRIMITIVES[model["primitive"]](**params))
+        vertices, vertex_normals, indices = weld(positions, normals)
+        suffix = f"_LOD{level}" if level else ""
+        levels.append(writer.add_mesh(model["object"] + suffix, vertices, vertex_normals, indices, quantize))
+        coarser = LOD_REDUCERS[model["primitive"]](params)
+        if coarser == params:
+            break
+        params = coarser
+    if len(levels) > 1:
+        writer.set_lods(levels[0], levels[1:], LOD_COVERAGE[:len(levels) - 1] + [0.0])
+    path = os.path.join(out_dir, f"{name}.glb")
+    with open(path + ".tmp", "wb") as handle:
+        handle.write(writer.to_bytes([levels[0]]))
+    os.replace(path + ".tmp", path)
+    return path
+
+
+# Blender export of one model inside the running session
+def build_blender(name, out_dir):
+    model = MODELS[name]
+    bpy.ops.object.select_all(action="SELECT")
+    bpy.ops.object.delete()
+    getattr(bpy.ops.mesh, f"primitive_{model['primitive']}_add")(location=(0, 0, 0), **model["params"])
+    obj = bpy.context.object
+    obj.name = model["object"]
+    path = os.path.join(out_dir, f"{name}.glb")
+    bpy.ops.export_scene.gltf(filepath=path, use_selection=True)
+    return path
+
+
+def stale_models(names, out_dir, options, force):
+    manifest = load_manifest(out_dir)
+    stale = []
+    for name in names:
+        digest = definition_hash(name, options)
+        exists = os.path.exists(os.path.join(out_dir, f"{name}.glb"))
+        if force or not exists or manifest.get(name) != digest:
+            stale.append(name)
+    return stale
+
+
+def record_built(out_dir, built, options):
+    manifest = load_manifest(out_dir)
+    for name in built:
+        manifest[name] = definition_hash(name, options)
+    save_manifest(out_dir, manifest)
+
+
+def run_blender_shards(names, args):
+    # bpy is single-threaded, so parallelism means several Blender sessions,
+    # each building its share of the stale models in one go
+    blender = args.blender or shutil.which("blender")
+    if not blender:
+        raise SystemExit("Blender not found; pass --blender or use --backend python")
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(names)))
+    shards = [names[i::jobs] for i in range(jobs)]
+    processes = [
+        subprocess.Popen([blender, "--background", "--factory-startup", "--python", os.path.abspath(__file__), "--",
+                          "--backend", "blender", "--out", args.out, "--only", ",".join(shard), "--force", "--no-manifest"])
+        for shard in shards
+    ]
+    failed = [shard for shard, process in zip(shards, processes) if process.wait() != 0]
+    if failed:
+        raise SystemExit(f"Blender failed building: {', '.join(n for shard in failed for n in shard)}")
+
+
+def main(argv=None):
+    if argv is None:
+        if bpy is None:
+            argv = sys.argv[1:]
+        else:
+            # Inside Blender, sys.argv holds Blender's own flags; ours follow "--"
+            argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Build the race/class GLB models")
+    parser.add_argument("--backend", choices=["python", "blender"], default="blender" if bpy else "python")
+    parser.add_argument("--out", default=HERE, help="output directory (default: next to this script)")
+    parser.add_argument("--only", help="comma-separated model names to build")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the definition is unchanged")
+    parser.add_argument("--jobs", type=int, help="parallel exports (default: CPU count)")
+    parser.add_argument("--lods", type=int, default=2, help="extra LOD levels (python backend)")
+    parser.add_argument("--no-quantize", action="store_true", help="write float attributes (python backend)")
+    parser.add_argument("--blender", help="path to the Blender executable")
+    parser.add_argument("--no-manifest", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else list(MODELS)
+    unknown = [name for name in names if name not in MODELS]
+    if unknown:
+        raise SystemExit(f"Unknown models: {', '.join(unknown)}")
+    os.makedirs(args.out, exist_ok=True)
+
+    if args.backend == "python":
+        options = {"backend": "python", "quantize": not args.no_quantize, "lods": args.lods}
+    else:
+        options = {"backend": "blender"}
+    stale = stale_models(names, args.out, options, args.force)
+    for name in names:
+        if name not in stale:
+            print(f"{name}: up to date")
+    if not stale:
+        return
+
+    if args.backend == "python":
+        jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(stale)))
+        build = [(name, args.out, options["quantize"], args.lods) for name in stale]
+        if jobs == 1:
+            paths = [build_python(*task) for task in build]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                paths = list(executor.map(build_python, *zip(*build)))
+        record_built(args.out, stale, options)
+    elif bpy is None:
+        run_blender_shards(stale, args)
+        # Shards don't touch the manifest; record what they produced from here
+        record_built(args.out, stale, options)
+        paths = [os.path.join(args.out, f"{name}.glb") for name in stale]
+    else:
+        paths = [build_blender(name, args.out) for name in stale]
+        if not args.no_manifest:
+            record_built(args.out, stale, options)
+
+    for path in paths:
+        print(f"built {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()